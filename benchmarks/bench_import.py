@@ -0,0 +1,75 @@
+"""Import-time benchmark, guarding snooble's startup budget.
+
+Runs ``python -X importtime`` in fresh interpreters and reports the cumulative time
+taken to import each target (the fastest of several runs, as import times are noisy)::
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --budget 10
+
+Exits with status 1 if ``import snooble`` takes longer than ``--budget`` milliseconds,
+or if it imports any of the modules that are meant to be loaded only on first use.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+TARGETS = [
+    ('import snooble', 'import snooble'),
+    ('RateLimiter', 'from snooble.ratelimit import RateLimiter; RateLimiter(5, 1).take()'),
+    ('responses', 'from snooble import responses'),
+    ('Snooble (core)', 'import snooble.core'),
+]
+
+# Modules that ``import snooble`` must not load
+DEFERRED = ('requests', 'urllib3', 'asyncio', 'snooble.core')
+
+
+def import_time(code):
+    """Return ``(microseconds, modules)`` for the snooble imports made by ``code``."""
+    script = "{code}\nimport sys\nprint(' '.join(sys.modules))".format(code=code)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', script],
+                            cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            check=True, universal_newlines=True)
+
+    total = 0
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package", where nested
+        # imports are indented under the package that imported them.
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if name.strip().startswith('snooble') and not name.startswith('  '):
+            total += int(cumulative)
+    return total, set(result.stdout.split())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=15,
+                        help="Milliseconds allowed for 'import snooble' (default 15).")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for label, code in TARGETS:
+        runs = [import_time(code) for _ in range(args.repeat)]
+        best = min(us for us, _ in runs) / 1000
+        print("{label:<20} {ms:>8.2f} ms".format(label=label, ms=best))
+
+        if code == 'import snooble':
+            loaded = sorted(set(DEFERRED) & runs[0][1])
+            if loaded:
+                print("  imports deferred modules:", ", ".join(loaded))
+                failed = True
+            if best > args.budget:
+                print("  over the {0} ms budget".format(args.budget))
+                failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
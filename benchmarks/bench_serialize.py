@@ -0,0 +1,42 @@
+"""Compare snooble.serialize against pickle and plain JSON on listing payloads.
+
+Run with ``python benchmarks/bench_serialize.py`` from the repository root.
+"""
+
+import json
+import os
+import pickle
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from snooble import responses, serialize  # noqa
+import payloads  # noqa
+
+
+def formats():
+    return {
+        'snooble.serialize': (serialize.dumps, serialize.loads),
+        'pickle': (lambda r: pickle.dumps(r, pickle.HIGHEST_PROTOCOL), pickle.loads),
+        'json': (lambda r: json.dumps(r.json).encode('utf-8'),
+                 lambda b: responses.create_response(json.loads(b.decode('utf-8')))),
+    }
+
+
+def main(number=200):
+    for label, payload in [('100-item listing', payloads.link_listing()),
+                           ('1000-comment thread', payloads.comment_thread())]:
+        resp = responses.create_response(payload)
+        print(label)
+        for name, (dump, load) in formats().items():
+            data = dump(resp)
+            dump_time = min(timeit.repeat(lambda: dump(resp), number=number, repeat=3))
+            load_time = min(timeit.repeat(lambda: load(data), number=number, repeat=3))
+            print("  {name:<18} {size:>8} bytes  dump {d:8.1f}us  load {l:8.1f}us".format(
+                name=name, size=len(data), d=dump_time / number * 1e6,
+                l=load_time / number * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+"""End-to-end load test of snooble against a local mock Reddit.
+
+Runs a number of simulated clients, each repeatedly fetching a listing through
+:class:`snooble.Snooble`, against a :class:`snooble.mockserver.MockReddit` running in a
+separate process.  Reports the achieved requests per second against the budget allowed
+by the clients' ratelimiters, latency percentiles, how many requests the server
+throttled with a 429, and the client-side CPU time spent per request.  Throughput is
+measured over the time the clients actually ran for, which runs past ``--duration`` by
+however long the last requests spent waiting on the ratelimiter::
+
+    python benchmarks/loadtest.py --clients 8 --mode thread --duration 10
+    python benchmarks/loadtest.py --clients 8 --mode process --budget 60 1
+    python benchmarks/loadtest.py --clients 8 --mode thread --shared --latency 0.02
+    python benchmarks/loadtest.py --clients 8 --mode process --shared --budget 60 1
+
+Clients either run in threads, in processes, or as asyncio tasks (which make their
+blocking calls in the event loop's default executor).  With ``--shared``, thread and
+asyncio clients share a single ``Snooble`` (and so a single ratelimiter and connection
+pool) rather than having one each, and process clients are forked from one ``Snooble``
+with a :class:`~snooble.ratelimit.SharedRateLimiter`.
+
+The ratelimiters hand out their budget evenly (``bursty=False``) unless ``--bursty`` is
+given: a bursty 600 per 60 seconds bucket allows 600 requests straight away, which
+would otherwise show up as throughput far above the budget in any short run.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent import futures
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import snooble  # noqa
+from snooble import errors, mockserver, transport  # noqa
+from snooble.ratelimit import RateLimiter, SharedRateLimiter  # noqa
+
+MODES = ('thread', 'process', 'asyncio')
+TRANSPORTS = {'requests': transport.RequestsTransport,
+              'urllib3': transport.Urllib3Transport}
+
+
+def serve(options, ready, stop):
+    """Run the mock server until ``stop`` is set, reporting its url and final stats."""
+    server = mockserver.MockReddit(latency=options.latency, error_rate=options.error_rate,
+                                   ratelimit=options.server_ratelimit, seed=0)
+    with server:
+        ready.put(server.url)
+        stop.wait()
+    ready.put(dict(server.stats))
+
+
+def make_client(url, budget, transport_name='requests', limiter=None):
+    """Create an authorized client, ratelimited by ``RateLimiter(*budget)``."""
+    snoo = snooble.Snooble('snooble load test', www_domain=url, auth_domain=url,
+                           ratelimit=limiter or RateLimiter(*budget),
+                           transport=TRANSPORTS[transport_name]())
+    snoo.oauth(snooble.oauth.SCRIPT_KIND, scopes=['read'], client_id='ClientID',
+               secret_id='Secret', username='user', password='pass')
+    snoo.authorize()
+    return snoo
+
+
+def limiter_args(options):
+    return options.budget + (options.bursty,)
+
+
+def make_clients(options, url):
+    if options.shared:
+        return [make_client(url, limiter_args(options), options.transport)] * \
+            options.clients
+    return [make_client(url, limiter_args(options), options.transport)
+            for _ in range(options.clients)]
+
+
+class Result(object):
+    """The measurements made by one or more clients."""
+
+    def __init__(self):
+        self.latencies = []
+        self.throttled = 0
+        self.errors = 0
+        self.cpu = 0.0
+        self.elapsed = 0.0
+
+    def record(self, func):
+        start = time.perf_counter()
+        try:
+            func()
+        except errors.RedditError as e:
+            if e.response is not None and e.response.status_code == 429:
+                self.throttled += 1
+            else:
+                self.errors += 1
+        self.latencies.append(time.perf_counter() - start)
+
+    def merge(self, other):
+        self.latencies.extend(other.latencies)
+        self.throttled += other.throttled
+        self.errors += other.errors
+        self.cpu += other.cpu
+        self.elapsed = max(self.elapsed, other.elapsed)
+        return self
+
+
+def run_client(snoo, endpoint, deadline, result=None):
+    result = result if result is not None else Result()
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        result.record(lambda: snoo.get(endpoint, limit=100))
+    # Includes the last request, however long it had to wait for the ratelimiter
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+# The Snooble that forked process clients share, with --shared
+_shared_client = None
+
+
+def _process_client(url, budget, transport_name, endpoint, duration):
+    # Clients in other processes start their clocks independently, as perf_counter
+    # values aren't comparable between processes.
+    snoo = _shared_client or make_client(url, budget, transport_name)
+    cpu = time.process_time()
+    result = run_client(snoo, endpoint, time.perf_counter() + duration)
+    result.cpu = time.process_time() - cpu
+    return result
+
+
+def run_threads(options, url):
+    clients = make_clients(options, url)
+    results = [Result() for _ in clients]
+    deadline = time.perf_counter() + options.duration
+    threads = [threading.Thread(target=run_client,
+                                args=(snoo, options.endpoint, deadline, result))
+               for snoo, result in zip(clients, results)]
+
+    cpu = time.process_time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    total = Result()
+    for result in results:
+        total.merge(result)
+    total.cpu = time.process_time() - cpu
+    return total
+
+
+def run_processes(options, url):
+    global _shared_client
+    context = multiprocessing
+    if options.shared:
+        # The workers have to be forked, so that they inherit the shared limiter
+        context = multiprocessing.get_context('fork')
+        _shared_client = make_client(url, None, options.transport,
+                                     limiter=SharedRateLimiter(*limiter_args(options)))
+    args = (url, limiter_args(options), options.transport, options.endpoint,
+            options.duration)
+    with context.Pool(options.clients) as pool:
+        results = pool.starmap(_process_client, [args] * options.clients)
+    total = Result()
+    for result in results:
+        total.merge(result)
+    return total
+
+
+def run_asyncio(options, url):
+    clients = make_clients(options, url)
+
+    async def client(loop, snoo, deadline, result):
+        started = time.perf_counter()
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                await loop.run_in_executor(None, snoo.get, options.endpoint)
+            except errors.RedditError as e:
+                if e.response is not None and e.response.status_code == 429:
+                    result.throttled += 1
+                else:
+                    result.errors += 1
+            result.latencies.append(time.perf_counter() - start)
+        result.elapsed = max(result.elapsed, time.perf_counter() - started)
+
+    async def main():
+        loop = asyncio.get_event_loop()
+        loop.set_default_executor(futures.ThreadPoolExecutor(options.clients))
+        result = Result()
+        deadline = time.perf_counter() + options.duration
+        await asyncio.gather(*(client(loop, snoo, deadline, result) for snoo in clients))
+        return result
+
+    cpu = time.process_time()
+    result = asyncio.run(main())
+    result.cpu = time.process_time() - cpu
+    return result
+
+
+RUNNERS = {'thread': run_threads, 'process': run_processes, 'asyncio': run_asyncio}
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return float('nan')
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def report(options, result, stats):
+    requests = len(result.latencies)
+    limiters = 1 if options.shared else options.clients
+    rate, per = options.budget
+    budget = limiters * rate / per
+    achieved = requests / result.elapsed if result.elapsed else 0.0
+    ordered = sorted(result.latencies)
+
+    shared = ' sharing one ratelimiter' if options.shared else ''
+    print("mode {mode}, {transport} transport, {clients} client(s){shared}, "
+          "{duration}s".format(mode=options.mode, transport=options.transport,
+                               clients=options.clients, shared=shared,
+                               duration=options.duration))
+    print("requests:     {0} ({1} throttled, {2} errors)".format(
+        requests, result.throttled, result.errors))
+    print("throughput:   {0:.1f} req/s of a {1:.1f} req/s budget ({2:.0%}) in {3:.2f}s"
+          .format(achieved, budget, achieved / budget, result.elapsed))
+    print("latency (ms): p50 {0:.2f}  p90 {1:.2f}  p99 {2:.2f}  max {3:.2f}".format(
+        *(1000 * percentile(ordered, p) for p in (0.5, 0.9, 0.99, 1.0))))
+    print("cpu/request:  {0:.1f} us".format(1e6 * result.cpu / max(requests, 1)))
+    print("server:       {0} requests, {1} throttled (429)".format(
+        stats.get('requests', 0), stats.get('throttled', 0)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--mode', choices=MODES, default='thread')
+    parser.add_argument('--shared', action='store_true',
+                        help="Share one Snooble (and ratelimiter) between clients.")
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--budget', type=float, nargs=2, default=(600, 60),
+                        metavar=('REQUESTS', 'PERIOD'),
+                        help="The ratelimit given to each Snooble (default 600 60).")
+    parser.add_argument('--bursty', action='store_true',
+                        help="Let the ratelimiters use their whole budget at once.")
+    parser.add_argument('--transport', choices=sorted(TRANSPORTS), default='requests')
+    parser.add_argument('--endpoint', default='r/snooble/new')
+    parser.add_argument('--latency', type=float, default=0,
+                        help="Server latency per request, in seconds.")
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--server-ratelimit', type=int, nargs=2, default=(600, 600),
+                        metavar=('REQUESTS', 'PERIOD'))
+    options = parser.parse_args(argv)
+    options.budget = (int(options.budget[0]), options.budget[1])
+    options.server_ratelimit = tuple(options.server_ratelimit)
+
+    ready, stop = multiprocessing.Queue(), multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(options, ready, stop))
+    server.start()
+    try:
+        url = ready.get(timeout=10)
+        result = RUNNERS[options.mode](options, url)
+    finally:
+        stop.set()
+    stats = ready.get(timeout=10)
+    server.join()
+
+    report(options, result, stats)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Synthetic but realistically-shaped Reddit payloads for benchmarking."""
+
+
+def link(i):
+    return {"kind": "t3", "data": {
+        "id": "{i:x}".format(i=i), "name": "t3_{i:x}".format(i=i),
+        "title": "A reasonably long submission title, number {i}".format(i=i),
+        "author": "user{i}".format(i=i % 97), "subreddit": "snooble",
+        "subreddit_id": "t5_2qh1i", "score": i * 7 % 1000, "ups": i * 7 % 1000,
+        "downs": 0, "num_comments": i % 300, "created_utc": 1430000000.0 + i,
+        "url": "https://example.com/articles/{i}".format(i=i),
+        "permalink": "/r/snooble/comments/{i:x}/a_reasonably_long_title/".format(i=i),
+        "selftext": "", "is_self": False, "over_18": False, "stickied": False,
+        "thumbnail": "default", "domain": "example.com", "edited": False,
+        "distinguished": None, "link_flair_text": None, "gilded": 0}}
+
+
+def listing(children, after=None, before=None):
+    return {"kind": "Listing", "data": {"children": children, "after": after,
+                                        "before": before, "modhash": ""}}
+
+
+def link_listing(size=100):
+    return listing([link(i) for i in range(size)], after="t3_{i:x}".format(i=size - 1))
+
+
+def comment(i, parent, replies=None, depth=0):
+    return {"kind": "t1", "data": {
+        "id": "c{i:x}".format(i=i), "name": "t1_c{i:x}".format(i=i),
+        "parent_id": parent, "link_id": "t3_0", "author": "user{i}".format(i=i % 89),
+        "body": "Comment body text that is long enough to be realistic. " * 3,
+        "score": i % 50, "created_utc": 1430000000.0 + i, "depth": depth,
+        "replies": listing(replies) if replies else ""}}
+
+
+def comment_thread(count=1000, branching=4):
+    """A comment thread of ``count`` comments, ``branching`` replies per comment."""
+    nodes = [comment(0, "t3_0")]
+    for i in range(1, count):
+        parent = nodes[(i - 1) // branching]
+        node = comment(i, parent['data']['name'], depth=parent['data']['depth'] + 1)
+        if not parent['data']['replies']:
+            parent['data']['replies'] = listing([])
+        parent['data']['replies']['data']['children'].append(node)
+        nodes.append(node)
+    return listing([nodes[0]])
+
+
+def deep_thread(depth=500):
+    """A single chain of ``depth`` nested replies."""
+    node = comment(depth, "t1_c{i:x}".format(i=depth - 1), depth=depth)
+    for i in reversed(range(depth)):
+        node = comment(i, "t1_c{i:x}".format(i=i - 1) if i else "t3_0", [node], depth=i)
+    return listing([node])
@@ -0,0 +1,236 @@
+"""Microbenchmarks for snooble's hot paths.
+
+Run from the repository root::
+
+    python benchmarks/run.py                        # print results
+    python benchmarks/run.py --save baseline.json   # save results as a baseline
+    python benchmarks/run.py --compare baseline.json
+
+Each benchmark is timed with :func:`timeit.repeat`, and the fastest repeat is reported
+(per operation, in microseconds) as it is the least affected by noise from the rest of
+the machine.  When comparing, any benchmark more than ``--threshold`` slower than the
+baseline is reported as a regression and the script exits with status 1.
+"""
+
+import argparse
+import collections
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import requests  # noqa
+
+import snooble  # noqa
+from snooble import comments, oauth, ratelimit, responses, serialize  # noqa
+from snooble.utils import cbc  # noqa
+
+import payloads  # noqa
+
+BENCHMARKS = collections.OrderedDict()
+
+
+def benchmark(func):
+    """Register a function returning the callable to time."""
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+class StubSession(object):
+    """A requests.Session stand-in that answers every request with the same body."""
+
+    def __init__(self, body):
+        self.headers = {}
+        self.body = json.dumps(body).encode('utf-8')
+
+    def request(self, method, url, **kwargs):
+        response = requests.models.Response()
+        response.status_code = 200
+        response._content = self.body
+        response.encoding = 'utf-8'
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+
+def stub_snooble(body, **kwargs):
+    snoo = snooble.Snooble('snooble benchmarks', session=StubSession(body),
+                           ratelimit=ratelimit.RateLimiter(10 ** 12, 1), **kwargs)
+    snoo.oauth(oauth.IMPLICIT_KIND, scopes=['read'], client_id='ClientID',
+               redirect_uri='https://example.com')
+    snoo.authorize('token')
+    return snoo
+
+
+@benchmark
+def ratelimit_take():
+    limiter = ratelimit.RateLimiter(10 ** 12, 1)
+    return limiter.take
+
+
+@benchmark
+def limited_method_call():
+    class Target(object):
+        def get(self):
+            return None
+
+    limited = ratelimit.RateLimiter(10 ** 12, 1).limitate(Target(), ['get'])
+    return lambda: limited.get()
+
+
+@benchmark
+def limited_unlimited_attribute():
+    class Target(object):
+        headers = {}
+
+    limited = ratelimit.RateLimiter(10 ** 12, 1).limitate(Target(), ['get'])
+    return lambda: limited.headers
+
+
+@benchmark
+def limited_decorator_call():
+    limiter = ratelimit.RateLimiter(10 ** 12, 1)
+    return limiter.limited(lambda: None)
+
+
+@benchmark
+def limited_context_manager():
+    limiter = ratelimit.RateLimiter(10 ** 12, 1)
+
+    def func():
+        with limiter:
+            pass
+    return func
+
+
+@benchmark
+def snooble_get_small():
+    snoo = stub_snooble({"kind": "t3", "data": {"id": "abc", "name": "t3_abc"}})
+    return lambda: snoo.get('api/info', id='t3_abc')
+
+
+@benchmark
+def snooble_get_listing():
+    snoo = stub_snooble(payloads.link_listing())
+    return lambda: snoo.get('r/snooble/new', limit=100)
+
+
+@benchmark
+def create_response_listing():
+    payload = payloads.link_listing()
+    return lambda: responses.create_response(payload)
+
+
+@benchmark
+def create_response_listing_identity_map():
+    payload = payloads.link_listing()
+    idmap = responses.IdentityMap(size=1000)
+    return lambda: responses.create_response(payload, idmap)
+
+
+@benchmark
+def create_response_deep_thread():
+    payload = payloads.deep_thread(500)
+    return lambda: responses.create_response(payload)
+
+
+@benchmark
+def comment_tree_deep():
+    payload = payloads.deep_thread(500)
+    return lambda: comments.CommentTree(payload)
+
+
+@benchmark
+def comment_tree_wide():
+    payload = payloads.comment_thread(1000)
+    return lambda: comments.CommentTree(payload)
+
+
+@benchmark
+def serialize_round_trip():
+    resp = responses.create_response(payloads.link_listing())
+    return lambda: serialize.loads(serialize.dumps(resp))
+
+
+@benchmark
+def callback_dispatch():
+    return lambda: oauth.AUTHORIZATION_METHODS[oauth.SCRIPT_KIND]
+
+
+@benchmark
+def callback_dispatch_default():
+    class WithDefault(cbc.CallbackClass):
+
+        def known():
+            pass
+
+        @cbc.CallbackClass.default
+        def fallback():
+            pass
+
+    return lambda: WithDefault['unknown']
+
+
+def run(names=None, repeat=5, target=0.2):
+    results = collections.OrderedDict()
+    for name, setup in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        func = setup()
+        timer = timeit.Timer(func)
+        # Pick a number of loops so that each repeat takes roughly ``target`` seconds.
+        number, elapsed = timer.autorange()
+        number = max(1, int(number * target / max(elapsed, 1e-9)))
+        times = sorted(t / number for t in timer.repeat(repeat=repeat, number=number))
+        results[name] = {"min": times[0] * 1e6, "median": times[len(times) // 2] * 1e6,
+                         "loops": number}
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result['min'] / baseline[name]['min']
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print("{name:<40} {base:>12.3f} -> {now:>12.3f} us  ({ratio:5.2f}x){flag}".format(
+            name=name, base=baseline[name]['min'], now=result['min'], ratio=ratio,
+            flag=flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run snooble's microbenchmarks.")
+    parser.add_argument('names', nargs='*', help="Only run these benchmarks.")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save', metavar='PATH', help="Save results as JSON.")
+    parser.add_argument('--compare', metavar='PATH', help="Compare against a baseline.")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Slowdown treated as a regression (default 0.25 = 25%%).")
+    args = parser.parse_args(argv)
+
+    results = run(args.names, repeat=args.repeat)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+    else:
+        regressions = []
+        for name, result in results.items():
+            print("{name:<40} {min:>12.3f} us  (median {median:.3f})".format(
+                name=name, **result))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
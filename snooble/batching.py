@@ -0,0 +1,135 @@
+"""Automatic batching of individual lookups.
+
+Code that looks things up one at a time, from many places or many threads, can't easily
+be rewritten to use :meth:`~snooble.Snooble.info`.  A :class:`BatchCollector` sits in
+between: each lookup immediately returns a :class:`~concurrent.futures.Future`, and
+lookups made within a short window of each other (or until a full batch is waiting) are
+sent to Reddit as a single ``api/info`` request.
+"""
+
+import collections
+import threading
+from concurrent import futures
+
+from . import INFO_BATCH_SIZE
+
+__all__ = ['BatchCollector']
+
+
+def _thing_key(thing):
+    return thing.fullname
+
+
+def _subreddit_key(thing):
+    return thing['display_name'].lower()
+
+
+# Maps the api/info parameter used for each kind of lookup to a function that gets the
+# same key back out of each returned thing.
+_LOOKUPS = {
+    'id': _thing_key,
+    'sr_name': _subreddit_key,
+}
+
+
+class BatchCollector(object):
+    """Collects individual lookups and sends them to Reddit in batches.
+
+    Example::
+
+        with BatchCollector(snoo) as collector:
+            post = collector.get_thing('t3_abc')
+            sub = collector.get_subreddit('python')
+            print(post.result()['title'], sub.result()['subscribers'])
+
+    Each future resolves to the response for that lookup, to ``None`` if Reddit didn't
+    return it, or raises whatever exception the batched request raised.
+    """
+
+    def __init__(self, snoo, window=0.02, max_size=INFO_BATCH_SIZE, concurrency=1):
+        """Create a collector for a :class:`~snooble.Snooble` instance.
+
+        Arguments:
+            snoo (Snooble): An authorized snooble instance to make requests with.
+            window (float): How long in seconds to wait after the first pending lookup
+                before sending a batch.  Defaults to 20ms.
+            max_size (int): Send a batch immediately once this many lookups are pending.
+                Defaults to the most that ``api/info`` accepts.
+            concurrency (int): How many batches may be in flight at once.
+        """
+        self.snoo = snoo
+        self.window = window
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._pending = dict((param, collections.OrderedDict()) for param in _LOOKUPS)
+        self._timers = {}
+        self._executor = futures.ThreadPoolExecutor(concurrency)
+
+    def get_thing(self, fullname):
+        """Look up a thing by fullname (e.g. ``'t3_abc'``), returning a future."""
+        return self._add('id', fullname)
+
+    def get_subreddit(self, name):
+        """Look up a subreddit's about data by name, returning a future."""
+        return self._add('sr_name', name.lower())
+
+    def _add(self, param, key):
+        future = futures.Future()
+        with self._lock:
+            pending = self._pending[param]
+            pending.setdefault(key, []).append(future)
+            if len(pending) >= self.max_size:
+                self._send(param)
+            elif param not in self._timers:
+                timer = threading.Timer(self.window, self._expire, (param,))
+                timer.daemon = True
+                self._timers[param] = timer
+                timer.start()
+        return future
+
+    def _expire(self, param):
+        with self._lock:
+            if self._timers.get(param) is threading.current_thread():
+                self._send(param)
+
+    def _send(self, param):
+        # Must be called with the lock held.
+        timer = self._timers.pop(param, None)
+        if timer is not None:
+            timer.cancel()
+
+        batch, self._pending[param] = self._pending[param], collections.OrderedDict()
+        if batch:
+            self._executor.submit(self._dispatch, param, batch)
+
+    def _dispatch(self, param, batch):
+        try:
+            listing = self.snoo.get('api/info', **{param: ",".join(batch)})
+        except Exception as e:
+            for waiting in batch.values():
+                for future in waiting:
+                    future.set_exception(e)
+            return
+
+        key = _LOOKUPS[param]
+        found = dict((key(thing), thing) for thing in listing)
+        for name, waiting in batch.items():
+            for future in waiting:
+                future.set_result(found.get(name))
+
+    def flush(self):
+        """Send every pending lookup now, without waiting for the window to pass."""
+        with self._lock:
+            for param in _LOOKUPS:
+                self._send(param)
+
+    def close(self):
+        """Send any pending lookups and wait for all batches to finish."""
+        self.flush()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
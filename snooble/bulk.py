@@ -0,0 +1,168 @@
+"""Running large numbers of actions in the background.
+
+Moderation tools often need to apply thousands of actions at once (approving, removing,
+flairing).  A :class:`BulkExecutor` queues actions and works through them on background
+threads as fast as the ratelimiter allows, retrying ones that fail for temporary
+reasons, so the caller can carry on and check on progress whenever it likes.
+"""
+
+import collections
+import threading
+import time
+from concurrent import futures
+
+import requests
+
+from . import errors
+
+__all__ = ['BulkExecutor', 'Action']
+
+Action = collections.namedtuple('Action', ['method', 'url', 'kwargs'])
+
+# Status codes that are worth retrying: rate limited, or a problem on Reddit's end.
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+
+class BulkExecutor(object):
+    """Queues actions and runs them in the background with retries.
+
+    Example::
+
+        with BulkExecutor(snoo) as executor:
+            for fullname in spam:
+                executor.submit('post', 'api/remove', id=fullname, spam=True)
+            print(executor.progress)
+
+        for action, error in executor.failures:
+            print("Couldn't", action, error)
+
+    Every action goes through the snooble instance, and so through its ratelimiter; the
+    executor never makes requests faster than the ratelimiter allows.
+    """
+
+    def __init__(self, snoo, workers=1, retries=3, backoff=1, on_progress=None):
+        """Create an executor.
+
+        Arguments:
+            snoo (Snooble): An authorized snooble instance to make requests with.
+            workers (int): The number of actions to run at once.  Defaults to ``1``.
+            retries (int): How many times to retry an action that failed with a
+                temporary error (connection problems, 429 or 5xx statuses, or a
+                ``RATELIMIT`` error in the response).  Any other errors Reddit reports
+                in a response fail the action with an :class:`~snooble.errors.APIError`.
+            backoff (float): The delay before the first retry, doubled for each retry
+                after that.  A ``Retry-After`` header, or the ``ratelimit`` given with a
+                ``RATELIMIT`` error, takes precedence.
+            on_progress (callable): Called with :attr:`progress` after every action
+                finishes, successfully or not.
+        """
+        self.snoo = snoo
+        self.retries = retries
+        self.backoff = backoff
+        self.on_progress = on_progress
+        self.failures = []
+        self._counts = collections.Counter()
+        self._lock = threading.Lock()
+        self._executor = futures.ThreadPoolExecutor(workers)
+
+    @property
+    def progress(self):
+        """A dict of how many actions were ``submitted``, ``completed``, ``failed``,
+        are still ``pending``, and how many ``retries`` have been made."""
+        with self._lock:
+            counts = dict((k, self._counts[k])
+                          for k in ('submitted', 'completed', 'failed', 'retries'))
+        counts['pending'] = counts['submitted'] - counts['completed'] - counts['failed']
+        return counts
+
+    def submit(self, method, url, **kwargs):
+        """Queue an action, returning a future for its response.
+
+        Arguments:
+            method (str): One of ``'get'``, ``'post'``, ``'put'`` or ``'delete'``.
+            url (str): The API path, as passed to e.g. :meth:`~snooble.Snooble.post`.
+            kwargs: The action's parameters.
+        """
+        action = Action(method, url, kwargs)
+        with self._lock:
+            self._counts['submitted'] += 1
+        return self._executor.submit(self._run, action)
+
+    def _run(self, action):
+        attempt = 0
+        while True:
+            try:
+                result = getattr(self.snoo, action.method)(action.url, **action.kwargs)
+                _check_api_errors(result)
+            except Exception as e:
+                if attempt < self.retries and _is_temporary(e):
+                    time.sleep(self._delay(e, attempt))
+                    attempt += 1
+                    self._count('retries')
+                    continue
+
+                with self._lock:
+                    self.failures.append((action, e))
+                self._count('failed')
+                raise
+            else:
+                self._count('completed')
+                return result
+
+    def _delay(self, error, attempt):
+        if getattr(error, 'ratelimit', None) is not None:
+            return float(error.ratelimit)
+        response = getattr(error, 'response', None)
+        if response is None:
+            return self.backoff * 2 ** attempt
+
+        retry_after = response.headers.get('Retry-After')
+        try:
+            return float(retry_after)
+        except (TypeError, ValueError):
+            return self.backoff * 2 ** attempt
+
+    def _count(self, key):
+        with self._lock:
+            self._counts[key] += 1
+        if key != 'retries' and self.on_progress is not None:
+            self.on_progress(self.progress)
+
+    def wait(self):
+        """Wait for every queued action to finish, and stop accepting new ones."""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.wait()
+
+
+def _check_api_errors(result):
+    # Most actions that Reddit refuses still come back as a 200, with the reasons in
+    # {"json": {"errors": [[code, message, field], ...]}}.
+    try:
+        body = result['json']
+        api_errors = body['errors']
+    except (TypeError, KeyError, IndexError):
+        return
+    if api_errors:
+        raise errors.APIError(api_errors, ratelimit=body.get('ratelimit'))
+
+
+def _is_temporary(error):
+    if isinstance(error, errors.APIError):
+        return 'RATELIMIT' in error.codes
+    if isinstance(error, errors.RedditError):
+        response = error.response
+        return response is not None and response.status_code in RETRY_STATUSES
+    if isinstance(error, requests.RequestException):
+        return True
+    # Urllib3Transport raises urllib3's own exceptions.  urllib3 isn't a dependency
+    # otherwise (older requests bundle their own copy), so it's only imported here.
+    try:
+        import urllib3
+    except ImportError:
+        return False
+    return isinstance(error, urllib3.exceptions.HTTPError)
@@ -0,0 +1,325 @@
+"""A flattened, array-backed representation of a comment thread.
+
+Reddit returns comment threads as nested listings, where every comment carries a
+``replies`` listing of its own.  Walking that structure recursively costs a stack frame
+per level, and building a response object for every comment up front allocates a lot of
+small objects that are usually never looked at.  :class:`CommentTree` instead lays the
+thread out in preorder, keeping the parent, depth, and subtree end of each comment in
+compact arrays, so that traversal, subtree slicing and descendant counts are all simple
+index arithmetic.
+
+Large threads are returned with ``more`` stubs in place of comments that didn't fit, which
+need to be fetched separately through ``api/morechildren``.  :class:`MoreExpander` gathers
+the IDs from every outstanding stub in a tree, packs them into as few requests as
+possible, and splices each batch of results into the tree as it arrives.
+"""
+
+import collections
+from array import array
+from concurrent import futures
+
+from . import responses, utils
+
+__all__ = ['CommentTree', 'MoreExpander']
+
+# The maximum number of comment IDs that api/morechildren will accept in one request
+MORECHILDREN_BATCH_SIZE = 100
+
+
+class CommentTree(object):
+    """A comment thread stored in preorder with parent/depth/extent arrays.
+
+    Comments are addressed by their index in preorder.  The subtree rooted at comment
+    ``i`` is always the contiguous range ``i`` to ``tree.ends[i]``, so slicing a subtree
+    or counting descendants never needs to walk the thread.  Response objects are only built
+    when a comment is accessed.
+
+    Attributes:
+        parents (array): The index of each comment's parent, or ``-1`` for top-level
+            comments.
+        depths (array): The nesting depth of each comment, starting at ``0``.
+        ends (array): One past the index of the last comment in each comment's subtree.
+        more (list[tuple]): A ``(parent_index, data)`` pair for every ``more`` stub found
+            in the thread, where ``data`` is the stub's raw data dictionary.
+    """
+
+    def __init__(self, listing):
+        """Build the tree from a comment listing.
+
+        Arguments:
+            listing: The raw JSON of a comment ``Listing``, a
+                :class:`~snooble.responses.Listing` of comments, or the two-element
+                ``[link, comments]`` array returned by the ``comments/<id>`` endpoint.
+        """
+        if isinstance(listing, responses.BaseResponse):
+            listing = listing.json
+            # create_response wraps the comments endpoint's array as {"data": [...]}
+            if isinstance(listing.get('data'), list):
+                listing = listing['data']
+        if isinstance(listing, (list, tuple)):
+            listing = listing[-1]
+
+        self.link_id = None
+        self._reset()
+        self._build(listing['data']['children'], _replies)
+
+    def _reset(self):
+        self._things = []
+        self._index = {}
+        self.parents = array('l')
+        self.depths = array('l')
+        self.ends = array('l')
+        self.more = []
+
+    def _build(self, children, children_of):
+        # An explicit stack of (parent index, depth, children iterator) replaces the
+        # recursion that nested listings would otherwise need.
+        stack = [(-1, 0, iter(children))]
+        while stack:
+            parent, depth, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                if parent >= 0:
+                    self.ends[parent] = len(self._things)
+                continue
+            elif child['kind'] == 'more':
+                self.more.append((parent, child['data']))
+                continue
+
+            index = len(self._things)
+            self._things.append(child)
+            self._index[child['data']['name']] = index
+            self.parents.append(parent)
+            self.depths.append(depth)
+            self.ends.append(index + 1)
+            if self.link_id is None:
+                self.link_id = child['data'].get('link_id')
+
+            replies = children_of(child)
+            if replies:
+                stack.append((index, depth + 1, iter(replies)))
+
+    def splice(self, things, expanded=()):
+        """Add comments and ``more`` stubs (e.g. from ``api/morechildren``) to the tree.
+
+        Each thing is placed under the comment named by its ``parent_id``, after that
+        comment's existing replies.  Things whose parent isn't in the tree (including
+        top-level comments, whose parent is the link) are added at the top level.  The
+        arrays are rebuilt in a single pass, so splicing a whole batch at once is much
+        cheaper than splicing things one at a time.
+
+        Arguments:
+            things (list[dict]): The raw JSON of the comments and stubs to add.
+            expanded (list[dict]): The data dictionaries of any ``more`` stubs (as found
+                in :attr:`more`) that these things replace, which will be removed.
+        """
+        expanded = set(id(data) for data in expanded)
+        added = collections.OrderedDict()
+        for thing in things:
+            if thing['kind'] == 'more' or thing['data']['name'] not in self._index:
+                added.setdefault(thing['data']['parent_id'], []).append(thing)
+
+        roots = []
+        old_children = [[] for _ in self._things]
+        for thing, parent in zip(self._things, self.parents):
+            (old_children[parent] if parent >= 0 else roots).append(thing)
+        for parent, data in self.more:
+            if id(data) not in expanded:
+                stub = {"kind": "more", "data": data}
+                (old_children[parent] if parent >= 0 else roots).append(stub)
+
+        old_index = self._index
+
+        def children_of(thing):
+            name = thing['data']['name']
+            existing = old_children[old_index[name]] if name in old_index else []
+            return existing + added.pop(name, [])
+
+        self._reset()
+        self._build(roots, children_of)
+        while added:
+            self._build(added.popitem(last=False)[1], children_of)
+
+    def __len__(self):
+        return len(self._things)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [responses.create_response(t) for t in self._things[index]]
+        return responses.create_response(self._things[index])
+
+    def __iter__(self):
+        return (responses.create_response(t) for t in self._things)
+
+    def __contains__(self, fullname):
+        return fullname in self._index
+
+    def index(self, fullname):
+        """Return the preorder index of the comment with the given fullname."""
+        return self._index[fullname]
+
+    def raw(self, index):
+        """Return the raw JSON of the comment at ``index`` without wrapping it."""
+        return self._things[index]
+
+    def roots(self):
+        """Return the indices of the top-level comments, in order."""
+        return self._siblings(0, len(self._things))
+
+    def children(self, index):
+        """Return the indices of the direct replies to comment ``index``, in order."""
+        return self._siblings(index + 1, self.ends[index])
+
+    def _siblings(self, start, stop):
+        ends = self.ends
+        result = []
+        while start < stop:
+            result.append(start)
+            start = ends[start]
+        return result
+
+    def subtree(self, index):
+        """Return the range of indices making up the subtree rooted at ``index``."""
+        return range(index, self.ends[index])
+
+    def descendant_count(self, index):
+        """Return the number of comments below comment ``index`` in the thread."""
+        return self.ends[index] - index - 1
+
+    def ancestors(self, index):
+        """Return the indices of the parents of ``index``, nearest first."""
+        result = []
+        parent = self.parents[index]
+        while parent >= 0:
+            result.append(parent)
+            parent = self.parents[parent]
+        return result
+
+
+class MoreExpander(object):
+    """Expands every ``more`` stub in a :class:`CommentTree` using batched requests.
+
+    Each round takes every stub currently in the tree, packs all of their comment IDs
+    into requests of up to :data:`MORECHILDREN_BATCH_SIZE`, and splices each response into
+    the tree as soon as it arrives.  The results may contain further stubs (for deeper
+    parts of the thread), which are expanded in the next round.  "Continue this thread"
+    stubs, which have no comment IDs, can't be expanded this way and are left in place.
+
+    Reddit rejects concurrent ``api/morechildren`` calls from the same user (the extra
+    ones fail, or come back empty), so ``concurrency`` above ``1`` is only worth trying
+    with an API that allows it, and a failed request has to be retried afterwards.
+
+    Attributes:
+        stats (collections.Counter): Counts of ``rounds``, ``requests`` made (and how
+            many ``failed``), comment ``ids`` requested, and ``comments`` added to the
+            tree.
+    """
+
+    def __init__(self, snoo, tree, link_id=None, concurrency=1, sort=None):
+        """Create an expander for a tree.
+
+        Arguments:
+            snoo (Snooble): An authorized snooble instance to make requests with.
+            tree (CommentTree): The tree to expand, which will be modified in place.
+            link_id (str): The fullname of the submission the comments belong to.
+                Defaults to the ``link_id`` of the comments in the tree.
+            concurrency (int): How many requests to make at once.  Defaults to ``1``;
+                see above before raising it.
+            sort (str): The comment sort to request, if any.
+        """
+        self.snoo = snoo
+        self.tree = tree
+        self.link_id = link_id or tree.link_id
+        self.concurrency = concurrency
+        self.sort = sort
+        self.stats = collections.Counter()
+        if self.link_id is None:
+            raise ValueError("Cannot expand comments without knowing the link_id")
+
+    def pending(self):
+        """Return the data of every stub in the tree that can still be expanded."""
+        return [data for parent, data in self.tree.more if data.get('children')]
+
+    def _fetch(self, ids):
+        params = {"api_type": "json", "link_id": self.link_id, "children": ",".join(ids)}
+        if self.sort is not None:
+            params['sort'] = self.sort
+        return self.snoo.get('api/morechildren', **params)['json']['data']['things']
+
+    def expand_once(self):
+        """Expand every stub currently in the tree, returning the number of requests.
+
+        If a request fails, any requests that haven't started yet are cancelled, the
+        results that did arrive are kept, and the first error is raised.  Stubs whose
+        IDs weren't all fetched stay in the tree (holding just the missing IDs), so
+        calling this again picks up where it left off.
+        """
+        stubs = self.pending()
+        if not stubs:
+            return 0
+
+        # A stub is only removed once every batch holding its IDs has been spliced in.
+        owners = {}
+        missing = {}
+        for data in stubs:
+            missing[id(data)] = set(data['children'])
+            for child in data['children']:
+                owners[child] = data
+        ids = [child for data in stubs for child in data['children']]
+        batches = list(utils.chunked(ids, MORECHILDREN_BATCH_SIZE))
+
+        error = None
+        with futures.ThreadPoolExecutor(self.concurrency) as executor:
+            requests = dict((executor.submit(self._fetch, batch), batch)
+                            for batch in batches)
+            for result in futures.as_completed(requests):
+                if result.cancelled():
+                    continue
+                try:
+                    things = result.result()
+                except Exception as e:
+                    self.stats['failed'] += 1
+                    if error is None:
+                        error = e
+                        for request in requests:
+                            request.cancel()
+                    continue
+
+                expanded = []
+                for child in requests[result]:
+                    data = owners[child]
+                    if child in missing[id(data)]:
+                        missing[id(data)].discard(child)
+                        if not missing[id(data)]:
+                            expanded.append(data)
+                self.tree.splice(things, expanded=expanded)
+                self.stats['comments'] += sum(1 for t in things if t['kind'] != 'more')
+
+        self.stats['rounds'] += 1
+        self.stats['requests'] += len(batches)
+        self.stats['ids'] += len(ids)
+        if error is not None:
+            for data in stubs:
+                if missing[id(data)]:
+                    data['children'] = [child for child in data['children']
+                                        if child in missing[id(data)]]
+            raise error
+        return len(batches)
+
+    def expand(self, rounds=None):
+        """Expand stubs until none are left (or for a number of rounds).
+
+        Returns the tree, for convenience.
+        """
+        while rounds is None or rounds > 0:
+            if not self.expand_once():
+                break
+            if rounds is not None:
+                rounds -= 1
+        return self.tree
+
+
+def _replies(thing):
+    replies = thing['data'].get('replies')
+    return replies['data']['children'] if replies else ()
@@ -0,0 +1,379 @@
+"""The :class:`Snooble` class, and the constants and types that go with it.
+
+Everything here is also available from the top-level ``snooble`` package, which only
+imports this module (and with it ``requests``) when one of them is first used.
+"""
+
+import collections
+import functools
+import marshal
+import os
+import threading
+import time
+import weakref
+from concurrent import futures
+from urllib import parse as urlp
+
+from . import oauth, errors, responses, tracing, utils
+from .transport import RequestsTransport
+from .ratelimit import RateLimiter
+from .stream import Stream
+
+
+AUTH_DOMAIN = 'https://oauth.reddit.com/'
+WWW_DOMAIN = 'https://www.reddit.com/'
+
+# The maximum number of fullnames that api/info will accept in a single request
+INFO_BATCH_SIZE = 100
+
+Domain = collections.namedtuple('Domain', ['auth', 'www'])
+RawResponse = collections.namedtuple('RawResponse', ['status', 'headers', 'body'])
+Warmup = collections.namedtuple('Warmup', ['connections', 'elapsed', 'connect_time'])
+
+# Every Snooble, so that their connections can be dropped in the child after a fork
+_instances = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    for snoo in list(_instances):
+        snoo._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class Snooble(object):
+
+    @property
+    def domain(self):
+        return Domain(auth=self.auth_domain, www=self.www_domain)
+
+    @domain.setter
+    def domain(self, tup):
+        self.www_domain, self.auth_domain = tup
+
+    @property
+    def authorized(self):
+        return self._auth is not None and self._auth.authorized
+
+    def __init__(self, useragent, bursty=False, ratelimit=(60, 60),
+                 www_domain=WWW_DOMAIN, auth_domain=AUTH_DOMAIN, auth=None,
+                 encode_all=False, identity_map=None, decode_executor=None,
+                 session=None, transport=None):
+        self.useragent = useragent
+        self.www_domain, self.auth_domain = www_domain, auth_domain
+
+        if isinstance(ratelimit, RateLimiter):
+            self._limiter = ratelimit
+        else:
+            self._limiter = RateLimiter(*ratelimit, bursty=bursty)
+
+        if session is None:
+            import requests
+            session = requests.Session()
+        self._session = session
+        self._session.headers.update({"User-Agent": useragent})
+        self._limited_session = self._limiter.limitate(self._session,
+                                                       ['get', 'post', 'put', 'delete'])
+        # Authorization always uses the session; everything else goes via the transport
+        self._transport = (transport if transport is not None
+                           else RequestsTransport(self._session))
+        self._transport.headers.update({"User-Agent": useragent})
+        self._auth = None
+        if identity_map is True:
+            identity_map = responses.IdentityMap()
+        elif identity_map is False:
+            identity_map = None
+        self.identity_map = identity_map
+        self.decode_executor = decode_executor
+        self._trace_hooks = []
+        if auth is not None:
+            self.oauth(auth)
+        _instances.add(self)
+
+    def oauth(self, auth=None, *args, **kwargs):
+        if auth is None and not len(args) and not len(kwargs):
+            return self._auth
+        elif not isinstance(auth, oauth.OAuth):
+            auth = oauth.OAuth(auth, *args, **kwargs)
+
+        old_auth, self._auth = self._auth, auth
+        return old_auth
+
+    def auth_url(self, state):
+        if self._auth is None:
+            raise ValueError("Cannot create auth url witout credentials")
+        if self._auth.kind not in (oauth.EXPLICIT_KIND, oauth.IMPLICIT_KIND):
+            raise ValueError("Selected auth kind does not use authorization URL")
+
+        response_type = 'code' if self._auth.kind == oauth.EXPLICIT_KIND else 'token'
+
+        options = {
+            "client_id": self._auth.client_id,
+            "response_type": response_type,
+            "state": state,
+            "redirect_uri": self._auth.redirect_uri,
+            "scope": ",".join(self._auth.scopes)
+        }
+
+        if self._auth.kind == oauth.EXPLICIT_KIND:
+            options['duration'] = self._auth.duration
+
+        base = urlp.urljoin(self.domain.www, 'api/v1/authorize')
+        if self._auth.mobile:
+            base += ".compact"
+        base += "?" + "&".join("{k}={v}".format(k=k, v=urlp.quote_plus(v))
+                               for (k, v) in options.items())
+        return base
+
+    def authorize(self, code=None, expires=3600):
+        if self._auth is None:
+            raise ValueError("Attempting authorization without credentials")
+        elif self._auth.kind not in oauth.ALL_KINDS:
+            raise ValueError("Unrecognised auth kind {k}".format(k=self._auth.kind))
+
+        create_auth_request = oauth.AUTHORIZATION_METHODS[self._auth.kind]
+        response = create_auth_request(self, self._auth, self._limited_session, code)
+
+        if response is None and self._auth.kind == oauth.IMPLICIT_KIND:
+            # implicit kind does not send confirmation request, it has already been
+            # given the correct token, just use that.
+            self._auth.authorization = \
+                oauth.Authorization(token_type='bearer', recieved=time.time(),
+                                    token=code, length=expires)
+        elif response.status_code != 200:
+            m = "Authorization failed (are all your details correct?)"
+            raise errors.RedditError(m, response=response)
+        elif 'error' in response.json():
+            m = "Authorization failed due to error: {error!r}"
+            error = response.json()['error']
+            raise errors.RedditError(m.format(error=error), response=response)
+        else:
+            r = response.json()
+            self._auth.authorization = \
+                oauth.Authorization(token_type=r['token_type'], recieved=time.time(),
+                                    token=r['access_token'], length=r['expires_in'])
+
+    def warmup(self, connections=1, authorize=False, code=None, block=True):
+        """Open pooled connections to both domains before they're needed.
+
+        Normally the first request to each domain pays for DNS, TCP and TLS.  This opens
+        ``connections`` connections to the API domain at once, and leaves them in the
+        connection pool for later requests to use.  Authorization only ever makes one
+        request at a time, so one connection to the ``www`` domain is opened for it, or
+        with ``authorize``, authorization runs alongside and opens its own.
+
+        Arguments:
+            connections (int): How many connections to open to the API domain.  There's
+                no point opening more than the pool will keep (10 by default).
+            authorize (bool): If true, also call :meth:`authorize` (with ``code``) at
+                the same time.
+            block (bool): If false, return immediately with a future for the result.
+
+        Returns:
+            A :data:`Warmup` of the number of ``connections`` opened, the time
+            ``elapsed`` warming up, and ``connect_time``, the total time spent
+            connecting.  ``connect_time`` is roughly the time that later requests have
+            been saved, some of which would otherwise have been spent one after another.
+            If ``authorize`` is true, ``elapsed`` includes authorization.
+        """
+        api = self._transport.connection_pool(self.domain.auth)
+        # All the connections are taken from the pools before any are opened, so that
+        # each one is new rather than one that's just been warmed up and put back.
+        taken = [(api, api._get_conn()) for _ in range(connections)]
+        if not authorize:
+            www = RequestsTransport(self._session).connection_pool(self.domain.www)
+            taken.append((www, www._get_conn()))
+        # Connections that are already open (e.g. the pools are shared because both
+        # domains are on one host) are put back untouched.
+        opening = [conn for _, conn in taken if conn.sock is None]
+
+        def connect(conn):
+            start = time.perf_counter()
+            conn.connect()
+            return time.perf_counter() - start
+
+        def run(executor):
+            start = time.perf_counter()
+            auth = executor.submit(self.authorize, code) if authorize else None
+            try:
+                times = list(executor.map(connect, opening))
+            finally:
+                for pool, conn in taken:
+                    pool._put_conn(conn)
+            if auth is not None:
+                auth.result()
+            return Warmup(connections=len(opening), elapsed=time.perf_counter() - start,
+                          connect_time=sum(times))
+
+        executor = futures.ThreadPoolExecutor(len(opening) + 1)
+        if block:
+            with executor:
+                return run(executor)
+
+        # The runner can't use the pool it's running in, or it might wait forever.
+        runner = futures.ThreadPoolExecutor(1)
+        result = runner.submit(run, executor)
+        result.add_done_callback(lambda _: executor.shutdown(wait=False))
+        runner.shutdown(wait=False)
+        return result
+
+    def _after_fork(self):
+        # Called in the child process after a fork.  Pooled connections are sockets
+        # shared with the parent (and any other children), so using them from two
+        # processes would interleave requests; drop them all and reconnect as needed.
+        # The ratelimiter resets its own lock (see snooble.ratelimit).
+        RequestsTransport(self._session).after_fork()
+        # The default transport wraps the same session, which has just been dealt with
+        after_fork = getattr(self._transport, 'after_fork', None)
+        if after_fork is not None and \
+                getattr(self._transport, 'session', None) is not self._session:
+            after_fork()
+        if self.identity_map is not None:
+            self.identity_map._lock = threading.Lock()
+
+    def add_trace_hook(self, hook):
+        """Call ``hook`` with a :class:`~snooble.tracing.TraceRecord` after each request.
+
+        Tracing costs nothing while no hooks are registered.
+        """
+        self._trace_hooks.append(hook)
+
+    def remove_trace_hook(self, hook):
+        self._trace_hooks.remove(hook)
+
+    def _prepare(self, url):
+        if not self.authorized:
+            raise ValueError("Snooble.authorize must be called before making requests")
+
+        headers = {"Authorization": " ".join((self._auth.authorization.token_type,
+                                              self._auth.authorization.token))}
+        return urlp.urljoin(self.domain.auth, url), headers
+
+    def _check(self, method, url, response):
+        if response.status_code >= 400:
+            m = "{method} request to {url} failed with status {status}"
+            raise errors.RedditError(m.format(method=method.upper(), url=url,
+                                              status=response.status_code),
+                                     response=response)
+
+    def _request(self, method, url, check=True, **kwargs):
+        url, headers = self._prepare(url)
+        self._limiter.take()
+        response = self._transport.request(method, url, headers=headers, **kwargs)
+        if check:
+            self._check(method, url, response)
+        return response
+
+    def _call(self, method, url, **kwargs):
+        if self._trace_hooks:
+            return tracing.traced_call(self, method, url, kwargs)
+        return self._build_response(self._request(method, url, **kwargs))
+
+    def get(self, url, **kwargs):
+        return self._call('get', url, params=kwargs)
+
+    def post(self, url, **kwargs):
+        """Make an authorized POST request, sending the keyword arguments as form data."""
+        return self._call('post', url, data=kwargs)
+
+    def put(self, url, **kwargs):
+        """Make an authorized PUT request, sending the keyword arguments as form data."""
+        return self._call('put', url, data=kwargs)
+
+    def delete(self, url, **kwargs):
+        """Make an authorized DELETE request, sending the keyword arguments as params."""
+        return self._call('delete', url, params=kwargs)
+
+    async def _run_async(self, func, *args, **kwargs):
+        # The transport's executor if it has one (see AsyncioTransport), else the loop's
+        import asyncio
+        executor = getattr(self._transport, 'executor', None)
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+    async def aget(self, url, **kwargs):
+        """A coroutine version of :meth:`get`, making the request in an executor."""
+        return await self._run_async(self.get, url, **kwargs)
+
+    async def apost(self, url, **kwargs):
+        """A coroutine version of :meth:`post`, making the request in an executor."""
+        return await self._run_async(self.post, url, **kwargs)
+
+    async def aput(self, url, **kwargs):
+        """A coroutine version of :meth:`put`, making the request in an executor."""
+        return await self._run_async(self.put, url, **kwargs)
+
+    async def adelete(self, url, **kwargs):
+        """A coroutine version of :meth:`delete`, making the request in an executor."""
+        return await self._run_async(self.delete, url, **kwargs)
+
+    def _build_response(self, response):
+        if not response.content:
+            # Some actions (e.g. DELETE requests) reply with an empty body
+            return None
+        elif self.decode_executor is None:
+            return responses.create_response(response.json(), self.identity_map)
+
+        # JSON parsing happens in the executor, typically a process pool, so that large
+        # bodies don't hold the GIL here.  Only the parsed data comes back, marshalled;
+        # response objects are cheap to build by comparison, and are built once, here,
+        # where they can be merged into the identity map.
+        data = self.decode_executor.submit(responses.decode, response.content).result()
+        return responses.create_response(marshal.loads(data), self.identity_map)
+
+    def get_raw(self, url, **kwargs):
+        """Make a GET request, returning the body without decoding it.
+
+        The request is made in exactly the same way as :meth:`get`, but the body is
+        returned as the bytes sent by Reddit, along with the status code and headers.
+        The body is not decompressed, so if the headers have a ``Content-Encoding`` the
+        response can be forwarded verbatim without re-encoding it.
+        """
+        if self._trace_hooks:
+            return tracing.traced_call(self, 'get', url, {'params': kwargs}, raw=True)
+
+        response = self._request('get', url, params=kwargs, stream=True, check=False)
+        return RawResponse(status=response.status_code, headers=response.headers,
+                           body=response.raw.read(decode_content=False))
+
+    def info(self, fullnames, concurrency=1):
+        """Fetch many things by fullname using as few requests as possible.
+
+        The fullnames are deduplicated and split into batches of up to
+        :data:`INFO_BATCH_SIZE`, each of which is fetched with one call to ``api/info``.
+
+        Arguments:
+            fullnames (list[str]): The fullnames (e.g. ``'t3_abc'``) to fetch.
+            concurrency (int): The number of batches to request at once.  All requests
+                still go through the ratelimiter.  Defaults to ``1``.
+
+        Returns:
+            A list with one entry per fullname passed in, in the same order.  Things that
+            Reddit did not return (e.g. because they don't exist) are ``None``.
+        """
+        fullnames = list(utils.strlist(fullnames))
+        unique = collections.OrderedDict.fromkeys(fullnames)
+        batches = utils.chunked(unique, INFO_BATCH_SIZE)
+
+        def fetch(batch):
+            return self.get('api/info', id=",".join(batch))
+
+        found = {}
+        if concurrency > 1:
+            with futures.ThreadPoolExecutor(concurrency) as executor:
+                listings = list(executor.map(fetch, batches))
+        else:
+            listings = map(fetch, batches)
+
+        for listing in listings:
+            found.update((thing.fullname, thing) for thing in listing)
+        return [found.get(name) for name in fullnames]
+
+    def stream(self, listing, **kwargs):
+        """Return a :class:`~snooble.stream.Stream` of new items in a listing.
+
+        All keyword arguments are passed to :class:`~snooble.stream.Stream`.
+        """
+        return Stream(self, listing, **kwargs)
@@ -7,3 +7,23 @@ class RedditError(SnoobleError):
     def __init__(self, arg, response=None):
         super().__init__(self, arg)
         self.response = response
+
+
+class APIError(RedditError):
+    """Reddit accepted a request, but reported errors in the ``json`` of its response.
+
+    Attributes:
+        errors (list): The ``[code, message, field]`` triples Reddit returned.
+        ratelimit (float): For ``RATELIMIT`` errors, how many seconds to wait before
+            trying again, if Reddit said.
+    """
+
+    def __init__(self, errors, ratelimit=None, response=None):
+        super().__init__(errors, response=response)
+        self.errors = errors
+        self.ratelimit = ratelimit
+
+    @property
+    def codes(self):
+        """The error codes (e.g. ``'RATELIMIT'``), in order."""
+        return [error[0] for error in self.errors]
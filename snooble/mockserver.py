@@ -0,0 +1,342 @@
+"""A local stand-in for Reddit's API, for load and behaviour testing.
+
+:class:`MockReddit` runs a small threaded HTTP server that implements enough of Reddit's
+API to drive snooble: ``api/v1/access_token``, subreddit listings, ``api/info``,
+``api/morechildren`` and ``api/v1/me``.  All data is synthetic: submissions and comments
+are created at a steady rate from the moment the server starts, with sequential IDs,
+so streams, ID scans and batching all behave much as they would against Reddit.
+
+Unlike recorded cassettes, the server can simulate latency, inject errors, and enforce a
+ratelimit with Reddit's ``X-Ratelimit-*`` headers and 429 responses, so throughput,
+retries and the ratelimiter can be tested on a single machine::
+
+    with MockReddit(latency=0.05, error_rate=0.01, ratelimit=(600, 600)) as server:
+        snoo = Snooble('load-test', www_domain=server.url, auth_domain=server.url)
+        ...
+
+It can also be run standalone with ``python -m snooble.mockserver``.
+"""
+
+import argparse
+import collections
+import json
+import random
+import re
+import socketserver
+import threading
+import time
+from http import server as http
+from urllib import parse as urlp
+
+from . import utils
+
+__all__ = ['MockReddit']
+
+# How many synthetic submissions exist before the server starts, so that listings and
+# ID ranges are never empty.
+INITIAL_ITEMS = 1000
+COMMENTS_PER_LINK = 5
+
+
+class _Server(socketserver.ThreadingMixIn, http.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class MockReddit(object):
+    """A local mock of Reddit's API.
+
+    Attributes:
+        url (str): The base url of the running server, ending in ``/``.
+        stats (collections.Counter): Counts of ``requests``, ``errors`` injected,
+            ``throttled`` (429) responses and ``unauthorized`` requests, plus a count
+            for every path requested.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0, error_rate=0,
+                 ratelimit=(600, 600), post_rate=1.0, subreddits=('snooble', 'python'),
+                 seed=None):
+        """Configure (but don't start) a server.
+
+        Arguments:
+            host/port: Where to listen.  The default port of ``0`` picks a free port.
+            latency (float or tuple): Seconds to wait before answering each request, or
+                a ``(min, max)`` pair to wait a random time between.
+            error_rate (float): The fraction of API requests to answer with a 500.
+            ratelimit (tuple): ``(requests, period)``; once more than ``requests`` have
+                been made within a ``period`` second window, requests get a 429.  Pass
+                ``None`` to disable.
+            post_rate (float): New submissions created per second.  Each has
+                ``COMMENTS_PER_LINK`` comments.
+            subreddits (tuple): The subreddits that submissions are spread across.
+            seed: A seed for the random number generator used for latency and errors.
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.ratelimit = ratelimit
+        self.post_rate = post_rate
+        self.subreddits = tuple(subreddits)
+        self.stats = collections.Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = None
+        self._window_used = 0
+        self._server = None
+        self._thread = None
+        self._started = None
+
+    @property
+    def url(self):
+        return "http://{host}:{port}/".format(host=self.host, port=self.port)
+
+    def start(self):
+        self._server = _Server((self.host, self.port), _handler(self))
+        self.port = self._server.server_address[1]
+        self._started = time.time()
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,))
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # Synthetic data
+
+    def newest_link(self):
+        """The ID of the newest submission that exists right now."""
+        return INITIAL_ITEMS + int((time.time() - self._started) * self.post_rate)
+
+    def _created(self, number):
+        return self._started + (number - INITIAL_ITEMS) / self.post_rate
+
+    def link(self, number):
+        subreddit = self.subreddits[number % len(self.subreddits)]
+        return {"kind": "t3", "data": {
+            "id": utils.base36_encode(number),
+            "name": utils.join_fullname('t3', number),
+            "title": "Synthetic submission {n}".format(n=number),
+            "subreddit": subreddit, "author": "user{n}".format(n=number % 50),
+            "created_utc": self._created(number), "score": number % 100,
+            "num_comments": COMMENTS_PER_LINK}}
+
+    def comment(self, number):
+        link = number // COMMENTS_PER_LINK
+        parent = (utils.join_fullname('t1', number - 1) if number % COMMENTS_PER_LINK
+                  else utils.join_fullname('t3', link))
+        return {"kind": "t1", "data": {
+            "id": utils.base36_encode(number),
+            "name": utils.join_fullname('t1', number),
+            "link_id": utils.join_fullname('t3', link), "parent_id": parent,
+            "subreddit": self.subreddits[link % len(self.subreddits)],
+            "author": "user{n}".format(n=number % 50), "body": "Comment {n}".format(n=number),
+            "created_utc": self._created(link), "score": number % 10, "replies": ""}}
+
+    def subreddit(self, name):
+        return {"kind": "t5", "data": {"display_name": name, "name": "t5_" + name,
+                                       "subscribers": 1000}}
+
+    def thing(self, fullname):
+        kind, number = utils.split_fullname(fullname)
+        newest = self.newest_link()
+        if kind == 't3' and number <= newest:
+            return self.link(number)
+        elif kind == 't1' and number < (newest + 1) * COMMENTS_PER_LINK:
+            return self.comment(number)
+
+    # Request handling
+
+    def _count(self, *keys):
+        with self._lock:
+            for key in keys:
+                self.stats[key] += 1
+
+    def _throttle(self):
+        # Returns the ratelimit headers, and whether the request is over the limit.
+        if self.ratelimit is None:
+            return {}, False
+
+        limit, period = self.ratelimit
+        with self._lock:
+            now = time.time()
+            if self._window_start is None or now - self._window_start >= period:
+                self._window_start, self._window_used = now, 0
+            self._window_used += 1
+            used = self._window_used
+            reset = period - (now - self._window_start)
+
+        headers = {"X-Ratelimit-Used": str(used),
+                   "X-Ratelimit-Remaining": str(max(limit - used, 0)),
+                   "X-Ratelimit-Reset": str(int(reset))}
+        return headers, used > limit
+
+    def handle(self, method, path, query, headers):
+        """Work out the response to a request, returning ``(status, headers, body)``."""
+        self._count('requests', path)
+
+        latency = self.latency
+        if isinstance(latency, (tuple, list)):
+            latency = self._random.uniform(*latency)
+        if latency:
+            time.sleep(latency)
+
+        if path == '/api/v1/access_token':
+            if method != 'POST' or not headers.get('Authorization', '').startswith('Basic'):
+                self._count('unauthorized')
+                return 401, {}, {"error": 401}
+            return 200, {}, {"access_token": "mock-token", "token_type": "bearer",
+                             "expires_in": 3600, "scope": "*"}
+
+        if not headers.get('Authorization', '').startswith('bearer '):
+            self._count('unauthorized')
+            return 401, {}, {"error": 401}
+
+        extra, throttled = self._throttle()
+        if throttled:
+            self._count('throttled')
+            extra['Retry-After'] = extra['X-Ratelimit-Reset']
+            return 429, extra, {"error": 429, "message": "Too Many Requests"}
+        if self.error_rate and self._random.random() < self.error_rate:
+            self._count('errors')
+            return 500, extra, {"error": 500}
+
+        for pattern, route in _ROUTES:
+            match = re.match(pattern, path)
+            if match:
+                return (200, extra) + (route(self, query, *match.groups()),)
+        return 404, extra, {"error": 404}
+
+    def _listing(self, query, subreddit, sort):
+        limit = min(int(query.get('limit', 25)), 100)
+        names = set(name.lower() for name in subreddit.split('+'))
+        everything = 'all' in names
+
+        def wanted(number):
+            return everything or self.subreddits[number % len(self.subreddits)] in names
+
+        newest = self.newest_link()
+        if 'before' in query:
+            # Like Reddit, return the items immediately newer than the cursor.
+            start = utils.split_fullname(query['before'])[1] + 1
+            numbers = [n for n in range(start, newest + 1) if wanted(n)][:limit][::-1]
+        else:
+            top = newest
+            if 'after' in query:
+                top = utils.split_fullname(query['after'])[1] - 1
+            numbers = []
+            for n in range(top, 0, -1):
+                if len(numbers) >= limit:
+                    break
+                if wanted(n):
+                    numbers.append(n)
+
+        if sort == 'comments':
+            things = [self.comment(n * COMMENTS_PER_LINK) for n in numbers]
+        else:
+            things = [self.link(n) for n in numbers]
+        after = things[-1]['data']['name'] if len(numbers) == limit else None
+        return _listing(things, after=after)
+
+    def _info(self, query):
+        things = []
+        for fullname in query.get('id', '').split(','):
+            thing = self.thing(fullname) if fullname else None
+            if thing is not None:
+                things.append(thing)
+        for name in filter(None, query.get('sr_name', '').split(',')):
+            things.append(self.subreddit(name))
+        return _listing(things)
+
+    def _morechildren(self, query):
+        things = [self.thing('t1_' + id) for id in query.get('children', '').split(',')]
+        return {"json": {"errors": [], "data": {"things": [t for t in things if t]}}}
+
+    def _me(self, query):
+        return {"name": "mock_user", "id": "mock", "link_karma": 1, "comment_karma": 1}
+
+    def _about(self, query, subreddit):
+        return self.subreddit(subreddit)
+
+
+def _listing(children, after=None):
+    return {"kind": "Listing", "data": {"children": children, "after": after,
+                                        "before": None, "modhash": ""}}
+
+
+_ROUTES = [
+    (r'^/r/([^/]+)/about/?$', MockReddit._about),
+    (r'^/r/([^/]+)/(new|hot|comments)/?$', MockReddit._listing),
+    (r'^/api/info/?$', MockReddit._info),
+    (r'^/api/morechildren/?$', MockReddit._morechildren),
+    (r'^/api/v1/me/?$', MockReddit._me),
+]
+
+
+def _handler(mock):
+
+    class Handler(http.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body are written separately; without this, Nagle's algorithm and
+        # delayed ACKs add ~40ms to every response on a kept-alive connection.
+        disable_nagle_algorithm = True
+
+        def _respond(self):
+            url = urlp.urlsplit(self.path)
+            query = dict(urlp.parse_qsl(url.query))
+            length = int(self.headers.get('Content-Length') or 0)
+            if length:
+                query.update(urlp.parse_qsl(self.rfile.read(length).decode('utf-8')))
+
+            status, headers, body = mock.handle(self.command, url.path, query,
+                                                self.headers)
+            body = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=UTF-8')
+            self.send_header('Content-Length', str(len(body)))
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = do_POST = do_PUT = do_DELETE = _respond
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--ratelimit', type=int, nargs=2, default=(600, 600),
+                        metavar=('REQUESTS', 'PERIOD'))
+    parser.add_argument('--post-rate', type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    server = MockReddit(host=args.host, port=args.port, latency=args.latency,
+                        error_rate=args.error_rate, ratelimit=tuple(args.ratelimit),
+                        post_rate=args.post_rate).start()
+    print("Mock Reddit listening on", server.url)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
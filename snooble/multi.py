@@ -0,0 +1,131 @@
+"""Polling many subreddits through combined multireddit listings.
+
+Reddit will serve the listing for several subreddits at once through paths like
+``r/python+learnpython+django/new``.  :class:`MultiredditPoller` takes advantage of this
+by packing every watched subreddit into as few combined listings as it can, each polled
+with a :class:`~snooble.stream.Stream`, and then splitting the results back out to a
+callback for each subreddit.  Watching 300 quiet subreddits then costs a handful of
+requests per cycle rather than 300.
+"""
+
+import collections
+import heapq
+
+from . import utils
+from .stream import Stream
+
+__all__ = ['MultiredditPoller']
+
+Watch = collections.namedtuple('Watch', ['name', 'weight', 'callback'])
+
+
+class MultiredditPoller(object):
+    """Polls many subreddits using as few combined listings as possible.
+
+    Subreddits are packed into groups using first-fit decreasing by weight.  A group is
+    full when its path would exceed ``max_path_length``, or when the total weight of its
+    subreddits (their expected number of new items per poll) would exceed
+    ``limit * target_fill``, so that a single busy subreddit can't crowd the rest of its
+    group out of the page.
+    """
+
+    def __init__(self, snoo, sort='new', limit=100, target_fill=0.5,
+                 max_path_length=2000, seen_size=10000, **stream_args):
+        """Create a poller with no watched subreddits.
+
+        Arguments:
+            snoo (Snooble): An authorized snooble instance to make requests with.
+            sort (str): The listing to poll for each group, e.g. ``'new'`` or
+                ``'comments'``.  Defaults to ``'new'``.
+            limit (int): The number of items to request per poll.
+            target_fill (float): The fraction of ``limit`` that a group's weights may
+                add up to.
+            max_path_length (int): The longest listing path a group may use.  Reddit
+                and intervening proxies reject very long URLs.
+            seen_size (int): How many recent fullnames to remember for deduplication.
+            stream_args: Passed through to the :class:`~snooble.stream.Stream` used
+                for each group.
+        """
+        self.snoo = snoo
+        self.sort = sort
+        self.limit = limit
+        self.target_fill = target_fill
+        self.max_path_length = max_path_length
+        self.stream_args = stream_args
+        self._watches = collections.OrderedDict()
+        self._streams = None
+        self._seen = utils.BoundedSet(seen_size)
+
+    def watch(self, name, callback=None, weight=1):
+        """Start watching a subreddit.
+
+        Arguments:
+            name (str): The subreddit's name, without the ``r/``.
+            callback (callable): Called with a list of the subreddit's new items, oldest
+                first, whenever a poll finds any.
+            weight (float): The expected number of new items per poll.  Defaults to
+                ``1``.
+        """
+        self._watches[name.lower()] = Watch(name, weight, callback)
+        self._streams = None
+
+    def unwatch(self, name):
+        del self._watches[name.lower()]
+        self._streams = None
+
+    def _path(self, names):
+        return "r/{names}/{sort}".format(names="+".join(names), sort=self.sort)
+
+    def _pack(self):
+        capacity = self.limit * self.target_fill
+        groups = []
+        for watch in sorted(self._watches.values(), key=lambda w: -w.weight):
+            for group in groups:
+                names, weight = group
+                if (weight + watch.weight <= capacity and
+                        len(self._path(names + [watch.name])) <= self.max_path_length):
+                    names.append(watch.name)
+                    group[1] += watch.weight
+                    break
+            else:
+                groups.append([[watch.name], watch.weight])
+        return [self._path(names) for names, weight in groups]
+
+    @property
+    def groups(self):
+        """The listing paths that will be polled, one request per path per cycle."""
+        return [stream.listing for stream in self._get_streams()]
+
+    def _get_streams(self):
+        if self._streams is None:
+            self._streams = [Stream(self.snoo, path, limit=self.limit, **self.stream_args)
+                             for path in self._pack()]
+        return self._streams
+
+    def poll(self):
+        """Poll every group once, returning all new items, oldest first.
+
+        New items are also passed to the callback of the subreddit they belong to.
+        """
+        results = []
+        for stream in self._get_streams():
+            new = [thing for thing in stream.poll() if thing.fullname not in self._seen]
+            for thing in new:
+                self._seen.add(thing.fullname)
+            results.append(new)
+
+        # Each group's items are already in order, so a heap merge keeps them that way.
+        merged = list(heapq.merge(*[[(thing.get('created_utc', 0), i, j, thing)
+                                     for j, thing in enumerate(result)]
+                                    for i, result in enumerate(results)]))
+        merged = [thing for created, i, j, thing in merged]
+
+        per_subreddit = collections.OrderedDict()
+        for thing in merged:
+            per_subreddit.setdefault(thing.get('subreddit', '').lower(), []).append(thing)
+        for name, things in per_subreddit.items():
+            watch = self._watches.get(name)
+            if watch is not None and watch.callback is not None:
+                watch.callback(things)
+
+        return merged
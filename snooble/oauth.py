@@ -1,7 +1,6 @@
 from . import utils
 from .utils import cbc
 
-from requests.auth import HTTPBasicAuth
 from urllib.parse import urljoin
 
 __all__ = [
@@ -152,11 +151,17 @@ class Authorization(object):
         return False
 
 
+def _basic_auth(username, password):
+    # requests is imported on first use rather than with this module
+    from requests.auth import HTTPBasicAuth
+    return HTTPBasicAuth(username, password)
+
+
 class AUTHORIZATION_METHODS(cbc.CallbackClass):
 
     @cbc.CallbackClass.key(SCRIPT_KIND)
     def authorize_script(snoo, auth, session, code):
-        client_auth = HTTPBasicAuth(auth.client_id, auth.secret_id)
+        client_auth = _basic_auth(auth.client_id, auth.secret_id)
         post_data = {"scope": ",".join(auth.scopes), "grant_type": "password",
                      "username": auth.username, "password": auth.password}
         url = urljoin(snoo.domain.www, 'api/v1/access_token')
@@ -165,7 +170,7 @@ class AUTHORIZATION_METHODS(cbc.CallbackClass):
 
     @cbc.CallbackClass.key(EXPLICIT_KIND)
     def authorize_explicit(snoo, auth, session, code):
-        client_auth = HTTPBasicAuth(auth.client_id, auth.secret_id)
+        client_auth = _basic_auth(auth.client_id, auth.secret_id)
         post_data = {"grant_type": "authorization_code", "code": code,
                      "redirect_uri": auth.redirect_uri}
         url = urljoin(snoo.domain.www, 'api/v1/access_token')
@@ -178,7 +183,7 @@ class AUTHORIZATION_METHODS(cbc.CallbackClass):
 
     @cbc.CallbackClass.key(APPLICATION_EXPLICIT_KIND)
     def authorize_application_explicit(snoo, auth, session, code):
-        client_auth = HTTPBasicAuth(auth.client_id, auth.secret_id)
+        client_auth = _basic_auth(auth.client_id, auth.secret_id)
         post_data = {"grant_type": "client_credentials"}
         url = urljoin(snoo.domain.www, 'api/v1/access_token')
 
@@ -186,7 +191,7 @@ class AUTHORIZATION_METHODS(cbc.CallbackClass):
 
     @cbc.CallbackClass.key(APPLICATION_INSTALLED_KIND)
     def authorize_application_implicit(snoo, auth, session, code):
-        client_auth = HTTPBasicAuth(auth.client_id, '')
+        client_auth = _basic_auth(auth.client_id, '')
         post_data = {"grant_type": "https://oauth.reddit.com/grants/installed_client",
                      "device_id": auth.device_id}
         url = urljoin(snoo.domain.www, 'api/v1/access_token')
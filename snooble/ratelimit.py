@@ -1,5 +1,8 @@
+import os
 import time
 import functools
+import threading
+import weakref
 
 
 class _LimitationObject(object):
@@ -7,19 +10,25 @@ class _LimitationObject(object):
     def __init__(self, ratelimiter, obj, override_list):
         self.__ratelimiter = ratelimiter
         self.__obj = obj
-        self.__override_list = override_list
+        self.__override_list = frozenset(override_list)
 
     def __getattr__(self, name):
+        # Only called when normal lookup fails, so once a limited method's wrapper has
+        # been cached in the instance dict, later accesses don't come through here.
         attribute = getattr(self.__obj, name)
 
         if name not in self.__override_list:
             return attribute
         elif callable(attribute):
+            obj, take = self.__obj, self.__ratelimiter.take
 
+            # The method is looked up again on each call so that reassigning it on the
+            # wrapped object still takes effect.
             @functools.wraps(attribute)
             def wrapper(*args, **kwargs):
-                self.__ratelimiter.take()
-                return attribute(*args, **kwargs)
+                take()
+                return getattr(obj, name)(*args, **kwargs)
+            self.__dict__[name] = wrapper
             return wrapper
 
         else:
@@ -27,6 +36,20 @@ class _LimitationObject(object):
             return attribute
 
 
+# Every limiter (by id, as they're unhashable), so that their locks can be replaced in
+# the child after a fork
+_limiters = weakref.WeakValueDictionary()
+
+
+def _after_fork_in_child():
+    for limiter in list(_limiters.values()):
+        limiter._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
 class RateLimiter(object):
 
     def __init__(self, rate, per, bursty=True):
@@ -40,6 +63,14 @@ class RateLimiter(object):
         self.bucket_size = self.current_bucket = rate
         self.refresh_period = per
         self.last_refresh = time.perf_counter()
+        self._lock = threading.Lock()
+        _limiters[id(self)] = self
+
+    def _after_fork(self):
+        # If another thread held the lock when the process forked, it will never be
+        # released in the child.  The child gets its own lock and its own copy of the
+        # bucket, so each process has the full budget; see SharedRateLimiter.
+        self._lock = threading.Lock()
 
     @property
     def bursty(self):
@@ -66,20 +97,48 @@ class RateLimiter(object):
             self.current_bucket = self.bucket_size
 
     def take(self, items=1, block=True):
-        for i in range(items):
-            while self.current_bucket < 1:
-                now = time.perf_counter()
-                if (self.last_refresh + self.refresh_period) <= now:
-                    self.last_refresh = now
-                    self.current_bucket = self.bucket_size
-                else:
-                    time.sleep((self.last_refresh + self.refresh_period) - now)
-
-            self.current_bucket -= 1
+        # Holding the lock while sleeping is deliberate: any other thread would only
+        # be waiting for the same refill anyway.
+        with self._lock:
+            for i in range(items):
+                while self.current_bucket < 1:
+                    now = time.perf_counter()
+                    if (self.last_refresh + self.refresh_period) <= now:
+                        self.last_refresh = now
+                        self.current_bucket = self.bucket_size
+                    else:
+                        time.sleep((self.last_refresh + self.refresh_period) - now)
+
+                self.current_bucket -= 1
 
     def limitate(self, obj, overrides):
         return _LimitationObject(self, obj, overrides)
 
+    def limited(self, func):
+        """Decorate ``func`` so that every call takes a token first.
+
+        Example:
+            >>> limiter = RateLimiter(60, 60)
+            >>> @limiter.limited
+            ... def fetch(url):
+            ...     return requests.get(url)
+        """
+        take = self.take
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            take()
+            return func(*args, **kwargs)
+        return wrapper
+
+    def __enter__(self):
+        # ``with limiter:`` takes a single token on entry, allocating nothing.
+        self.take()
+        return self
+
+    def __exit__(self, *exc_info):
+        return None
+
     def __repr__(self):
         cls = self.__class__.__name__
         fmt = "{cls}(rate={rate}, per={per}, bursty={bursty}, current={curr})"
@@ -91,3 +150,66 @@ class RateLimiter(object):
             return (self.bucket_size == other.bucket_size and
                     self.refresh_period == other.refresh_period and
                     self.bursty == other.bursty)
+
+
+class SharedRateLimiter(RateLimiter):
+    """A :class:`RateLimiter` whose bucket is shared between processes.
+
+    The bucket lives in shared memory, so every process forked (or started by
+    ``multiprocessing``) after the limiter is created takes tokens from the same bucket,
+    rather than each one getting the whole budget.  This is the one to use with
+    pre-fork servers::
+
+        limiter = SharedRateLimiter(60, 60)
+        snoo = Snooble(useragent, ratelimit=limiter)
+        # ... fork workers, which can all use snoo (or limiter) safely
+
+    The rate and burstiness are copied into each process when it starts, so they should
+    be set before forking.
+    """
+
+    def __init__(self, rate, per, bursty=True):
+        import multiprocessing
+        self._state = multiprocessing.RawArray('d', 2)
+        super().__init__(rate, per, bursty=bursty)
+        self._lock = multiprocessing.Lock()
+
+    @property
+    def current_bucket(self):
+        return self._state[0]
+
+    @current_bucket.setter
+    def current_bucket(self, value):
+        self._state[0] = value
+
+    @property
+    def last_refresh(self):
+        return self._state[1]
+
+    @last_refresh.setter
+    def last_refresh(self, value):
+        self._state[1] = value
+
+    def _after_fork(self):
+        # The lock is a semaphore shared with the other processes, so it's released
+        # properly even if a thread in the parent held it at the time of the fork.
+        pass
+
+    def take(self, items=1, block=True):
+        # Unlike RateLimiter.take, the lock is never held while sleeping: it's shared
+        # with every other process, which would all stall behind the sleeper (and a
+        # process killed mid-sleep would never release it).  The wait is worked out
+        # under the lock, then the token is tried for again after sleeping.
+        for i in range(items):
+            while True:
+                with self._lock:
+                    if self.current_bucket < 1:
+                        now = time.perf_counter()
+                        wait = (self.last_refresh + self.refresh_period) - now
+                        if wait <= 0:
+                            self.last_refresh = now
+                            self.current_bucket = self.bucket_size
+                    if self.current_bucket >= 1:
+                        self.current_bucket -= 1
+                        break
+                time.sleep(wait)
@@ -0,0 +1,238 @@
+"""Recording and replaying request sessions.
+
+:class:`RecordingSession` wraps the ``requests.Session`` a :class:`~snooble.Snooble`
+instance uses and writes every request and response, with timings, to a JSON lines log
+(gzipped if the path ends in ``.gz``).  :class:`ReplaySession` reads such a log back and
+answers requests from it, so a recorded session can be replayed through snooble without
+any network access, e.g. to profile parsing and ratelimiting against real traffic::
+
+    snoo = Snooble(useragent, session=RecordingSession(requests.Session(), 'log.gz'))
+    ...  # use snoo as normal
+
+    replay = ReplaySession('log.gz', speed=10)
+    snoo = Snooble(useragent, session=replay)
+    snoo.oauth(...)
+    snoo.authorize()  # answered from the log as well
+    replay.replay(snoo)  # re-issue every recorded request at 10x speed
+"""
+
+import base64
+import collections
+import datetime
+import gzip
+import json
+import threading
+import time
+from urllib import parse as urlp
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from . import errors
+
+__all__ = ['RecordingSession', 'ReplaySession']
+
+
+def _open(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class _BodyReader(object):
+    # Stands in for a response's raw stream once the body has already been read.
+
+    def __init__(self, body):
+        self._body = body
+
+    def read(self, amt=None, decode_content=None):
+        body, self._body = self._body, b''
+        return body
+
+
+class _SessionMethods(object):
+    # The requests.Session shortcut methods that snooble uses, in terms of request.
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+
+class RecordingSession(_SessionMethods):
+    """Wraps a ``requests.Session``, logging every request made through it.
+
+    Only the request's method, url, parameters and form data are logged (so not headers,
+    which contain credentials), along with the full response, the time taken, and when
+    the request was made relative to the first one.  Form data isn't logged for
+    authorization requests, as it may contain a password, but be aware that their
+    responses (which include the access token) are.
+    """
+
+    def __init__(self, session, path):
+        self.session = session
+        self.path = path
+        self._file = _open(path, 'w')
+        self._lock = threading.Lock()
+        self._started = None
+
+    @property
+    def headers(self):
+        return self.session.headers
+
+    def request(self, method, url, **kwargs):
+        start = time.perf_counter()
+        response = self.session.request(method, url, **kwargs)
+        body = response.content
+        elapsed = time.perf_counter() - start
+
+        if kwargs.get('stream'):
+            # The body has been read to record it, so anything wanting the raw stream
+            # gets the decoded body, which is no longer compressed.
+            response.raw = _BodyReader(body)
+            response.headers.pop('Content-Encoding', None)
+
+        with self._lock:
+            if self._started is None:
+                self._started = start
+            record = {
+                "t": start - self._started, "elapsed": elapsed,
+                "method": method.upper(), "url": url,
+                "params": kwargs.get('params'),
+                "data": kwargs.get('data') if 'auth' not in kwargs else None,
+                "status": response.status_code,
+                "headers": dict((k, v) for k, v in response.headers.items()
+                                if k.lower() != 'content-encoding'),
+                "body": base64.b64encode(body).decode('ascii'),
+            }
+            self._file.write(json.dumps(record, separators=(',', ':')) + "\n")
+            self._file.flush()
+        return response
+
+    def close(self):
+        self._file.close()
+        self.session.close()
+
+
+class ReplaySession(_SessionMethods):
+    """Answers requests from a log written by :class:`RecordingSession`.
+
+    Each request is answered with the first unused record with the same method, url,
+    parameters and form data (compared as they would be sent, so the order of keys and
+    e.g. ``1`` versus ``'1'`` don't matter), so replays work even if concurrent requests
+    finish in a different order.  Authorization requests are matched without their form
+    data, which isn't recorded.  A request that doesn't match any remaining record raises
+    :class:`~snooble.errors.SnoobleError`.
+    """
+
+    def __init__(self, path, speed=None):
+        """Load a log.
+
+        Arguments:
+            path (str): The log to replay.
+            speed (float): If given, each response is delayed by its recorded time
+                divided by ``speed``, and :meth:`replay` spaces requests out the same
+                way, so ``1`` replays at the original speed and ``10`` ten times
+                faster.  If ``None`` (the default), responses are returned immediately.
+        """
+        self.headers = CaseInsensitiveDict()
+        self.speed = speed
+        with _open(path, 'r') as f:
+            self.records = [json.loads(line) for line in f if line.strip()]
+        # The unused records for each match key, in the order they were recorded
+        self._unused = collections.defaultdict(collections.deque)
+        for record in self.records:
+            key = _match_key(record['method'], record['url'], record['params'],
+                             record['data'])
+            self._unused[key].append(record)
+        self._remaining = len(self.records)
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self):
+        """The number of records that have not been used yet."""
+        return self._remaining
+
+    def _find(self, key):
+        with self._lock:
+            unused = self._unused.get(key)
+            if unused:
+                self._remaining -= 1
+                return unused.popleft()
+        method, url, params, data = key
+        raise errors.SnoobleError("No recorded response for {method} {url}{params}{data}"
+                                  .format(method=method, url=url,
+                                          params='?' + params if params else '',
+                                          data=' with ' + data if data else ''))
+
+    def request(self, method, url, **kwargs):
+        data = kwargs.get('data') if 'auth' not in kwargs else None
+        record = self._find(_match_key(method, url, kwargs.get('params'), data))
+        if self.speed:
+            time.sleep(record['elapsed'] / self.speed)
+        return _build_response(record)
+
+    def replay(self, snoo):
+        """Re-issue every recorded API request through ``snoo``.
+
+        Requests to ``snoo``'s API domain are made through its normal methods, so they
+        are authorized, ratelimited and parsed as usual.  Records made on other domains
+        (i.e. authorization requests) are skipped.  Returns a list of the results.
+        """
+        results = []
+        start = time.perf_counter()
+        for record in list(self.records):
+            if not record['url'].startswith(snoo.domain.auth):
+                continue
+            if self.speed:
+                delay = start + record['t'] / self.speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+            path = record['url'][len(snoo.domain.auth):]
+            args = record['params'] if record['method'] in ('GET', 'DELETE') \
+                else record['data']
+            results.append(getattr(snoo, record['method'].lower())(path, **(args or {})))
+        return results
+
+    def close(self):
+        pass
+
+
+def _canonical(args):
+    # Parameters or form data as the url-encoded pairs requests would send, sorted.
+    if not args:
+        return ''
+    if isinstance(args, (str, bytes)):
+        return args if isinstance(args, str) else args.decode('utf-8')
+    pairs = []
+    for key, value in (args.items() if hasattr(args, 'items') else args):
+        for value in (value if isinstance(value, (list, tuple)) else [value]):
+            if value is not None:
+                pairs.append((str(key), str(value)))
+    return urlp.urlencode(sorted(pairs))
+
+
+def _match_key(method, url, params, data):
+    return (method.upper(), url, _canonical(params), _canonical(data))
+
+
+def _build_response(record):
+    body = base64.b64decode(record['body'])
+    response = requests.models.Response()
+    response.status_code = record['status']
+    response.headers = CaseInsensitiveDict(record['headers'])
+    response.url = record['url']
+    response._content = body
+    response._content_consumed = True
+    response.raw = _BodyReader(body)
+    response.elapsed = datetime.timedelta(seconds=record['elapsed'])
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    return response
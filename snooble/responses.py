@@ -1,5 +1,13 @@
+import collections
+import json
+import marshal
+import threading
+import weakref
+
 from .compat import Mapping
 
+_MISSING = object()
+
 
 class BaseResponse(Mapping):
 
@@ -16,17 +24,43 @@ class BaseResponse(Mapping):
     def __len__(self):
         return len(self._data)
 
+    def __reduce__(self):
+        # Only the raw JSON needs to be stored, the wrapped data is rebuilt from it.
+        return (self.__class__, (self.json,))
+
 
 class Response(BaseResponse):
 
     def __init__(self, resp):
         super().__init__(resp, resp['data'])
+        self.changed = frozenset()
+
+    @property
+    def fullname(self):
+        """The Reddit fullname (e.g. ``'t3_abc'``) of this thing, or ``None``."""
+        name = self._data.get('name')
+        if name is None and 'kind' in self.json and 'id' in self._data:
+            name = "{kind}_{id}".format(kind=self.json['kind'], id=self._data['id'])
+        return name
+
+    def update(self, resp):
+        """Replace this response's data in place with a newer copy of the same thing.
+
+        Returns the set of keys whose values differ between the old and new data, which
+        is also stored as :attr:`changed` until the next update.
+        """
+        old, new = self._data, resp['data']
+        self.changed = frozenset(k for k in set(old) | set(new)
+                                 if old.get(k, _MISSING) != new.get(k, _MISSING))
+        self.json, self._data = resp, new
+        return self.changed
 
 
 class Listing(BaseResponse):
 
-    def __init__(self, resp):
-        super().__init__(resp, [create_response(c) for c in resp['data']['children']])
+    def __init__(self, resp, identity_map=None):
+        super().__init__(resp, [create_response(c, identity_map)
+                                for c in resp['data']['children']])
 
 
 class Subreddit(Response):
@@ -41,8 +75,86 @@ RESPONSE_TYPES = {
 }
 
 
-def create_response(resp):
-    if 'kind' in resp:
-        return RESPONSE_TYPES.get(resp['kind'], Response)(resp)
-    else:
+class IdentityMap(object):
+    """Keeps a single response object per Reddit fullname.
+
+    When a thing that is already held is fetched again, the existing object is updated in
+    place (see :meth:`Response.update`) rather than a new object being created, so
+    identity can be used to track changes across repeated polls.  By default objects are
+    held by weak reference and disappear when nothing else uses them; if ``size`` is
+    given, strong references to the ``size`` most recently seen objects are kept instead.
+    """
+
+    def __init__(self, size=None):
+        self.size = size
+        if size is None:
+            self._things = weakref.WeakValueDictionary()
+        else:
+            self._things = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, fullname):
+        return fullname in self._things
+
+    def __len__(self):
+        return len(self._things)
+
+    def get(self, fullname, default=None):
+        return self._things.get(fullname, default)
+
+    def merge(self, resp, cls=Response):
+        """Return the held object for ``resp``, updated, or a new ``cls`` instance."""
+        with self._lock:
+            fullname = _fullname(resp)
+            existing = self._things.get(fullname) if fullname is not None else None
+            if existing is not None:
+                existing.update(resp)
+                if self.size is not None:
+                    self._things.move_to_end(fullname)
+                return existing
+
+            thing = cls(resp)
+            if fullname is not None:
+                self._things[fullname] = thing
+                if self.size is not None and len(self._things) > self.size:
+                    self._things.popitem(last=False)
+            return thing
+
+    def clear(self):
+        with self._lock:
+            self._things.clear()
+
+
+def _fullname(resp):
+    data = resp.get('data', {})
+    if 'name' in data:
+        return data['name']
+    elif 'kind' in resp and 'id' in data:
+        return "{kind}_{id}".format(kind=resp['kind'], id=data['id'])
+
+
+def create_response(resp, identity_map=None):
+    if 'kind' not in resp:
         return Response({"data": resp})
+
+    cls = RESPONSE_TYPES.get(resp['kind'], Response)
+    if identity_map is None:
+        return cls(resp)
+    elif issubclass(cls, Listing):
+        return cls(resp, identity_map=identity_map)
+    else:
+        return identity_map.merge(resp, cls)
+
+
+def decode(body):
+    """Parse a raw JSON body, returning the data marshalled back into bytes.
+
+    This is a module-level function so that it can be sent to a process pool, see the
+    ``decode_executor`` argument to :class:`~snooble.Snooble`.  Parsing JSON is the
+    expensive part of handling a response; :mod:`marshal` bytes cross the process
+    boundary as a single string and load again two to three times faster than the JSON
+    they came from.  The response objects are built by the caller with
+    :func:`create_response`, so that building isn't done twice and so that they can
+    be merged into an identity map.
+    """
+    return marshal.dumps(json.loads(body))
@@ -0,0 +1,103 @@
+"""Scanning ranges of Reddit IDs.
+
+Listings stop after 1000 items, so they can't be used to archive everything posted in a
+period.  Because IDs are sequential, though, every submission or comment in a range can
+be enumerated directly: :class:`IDScanner` turns a range of IDs into ``api/info``
+requests of 100 fullnames each, makes them through the ratelimiter (optionally several
+at once), and yields whatever exists, in ID order.  Progress can be saved to a
+checkpoint file so that an interrupted scan picks up where it left off.
+"""
+
+import collections
+from concurrent import futures
+
+from . import INFO_BATCH_SIZE, utils
+
+__all__ = ['IDScanner']
+
+
+class IDScanner(object):
+    """An iterator over every existing thing of one kind in a range of IDs.
+
+    Attributes:
+        position (int): The first ID that has not yet been completely yielded.
+        stats (collections.Counter): Counts of ``requests`` made, IDs ``scanned``,
+            and things ``found``.
+    """
+
+    def __init__(self, snoo, kind, start, end, concurrency=1, checkpoint=None):
+        """Create a scanner for a range of IDs.
+
+        Arguments:
+            snoo (Snooble): An authorized snooble instance to make requests with.
+            kind (str): The kind of thing to scan, e.g. ``'t3'`` or ``'t1'``.
+            start/end (str or int): The first and last IDs in the range, inclusive.
+                Strings are treated as base36 IDs, either bare or as fullnames.
+            concurrency (int): How many requests to make at once.  Defaults to ``1``.
+            checkpoint (str): A path to save progress to after every batch.  If the
+                file exists and describes the same scan, scanning resumes from it.
+        """
+        self.snoo = snoo
+        self.kind = kind
+        self.start = _to_id(start)
+        self.end = _to_id(end)
+        self.concurrency = concurrency
+        self.checkpoint = checkpoint
+        self.position = self.start
+        self.stats = collections.Counter()
+
+        saved = utils.load_json(checkpoint) if checkpoint is not None else None
+        if saved is not None and self._describe() == saved['scan']:
+            self.position = saved['position']
+
+    def _describe(self):
+        return {"kind": self.kind, "start": self.start, "end": self.end}
+
+    def _save(self):
+        if self.checkpoint is not None:
+            utils.save_json(self.checkpoint, {"scan": self._describe(),
+                                              "position": self.position})
+
+    @property
+    def remaining(self):
+        """The number of IDs that have yet to be scanned."""
+        return max(self.end + 1 - self.position, 0)
+
+    def _fetch(self, batch):
+        return [thing for thing in self.snoo.info(batch) if thing is not None]
+
+    def __iter__(self):
+        batches = utils.chunked((utils.join_fullname(self.kind, n)
+                                 for n in range(self.position, self.end + 1)),
+                                INFO_BATCH_SIZE)
+
+        # Keep a bounded number of requests in flight, but yield in submission order so
+        # that the checkpoint only ever moves past batches that were fully consumed.
+        with futures.ThreadPoolExecutor(self.concurrency) as executor:
+            pending = collections.deque()
+            for batch in batches:
+                pending.append((len(batch), executor.submit(self._fetch, batch)))
+                if len(pending) >= self.concurrency:
+                    for thing in self._complete(*pending.popleft()):
+                        yield thing
+
+            while pending:
+                for thing in self._complete(*pending.popleft()):
+                    yield thing
+
+    def _complete(self, size, future):
+        found = future.result()
+        self.stats['requests'] += 1
+        self.stats['scanned'] += size
+        self.stats['found'] += len(found)
+        for thing in found:
+            yield thing
+
+        self.position += size
+        self._save()
+
+
+def _to_id(value):
+    if isinstance(value, int):
+        return value
+    return utils.base36_decode(value.rpartition('_')[2])
@@ -0,0 +1,175 @@
+"""Scheduling polls of many feeds within a single ratelimit budget.
+
+Polling every feed at the same interval spends most of the budget on feeds where nothing
+happens, and lets busy feeds fall behind.  :class:`PollScheduler` instead keeps an
+exponential moving average of each feed's item rate and shares the request budget out
+between feeds accordingly.
+
+If a feed produces items at rate ``r`` and is polled every ``T`` seconds, items wait
+``T / 2`` on average, so the feed contributes ``r * T / 2`` item-seconds of lateness per
+second.  Minimising the total subject to a fixed budget of polls per second gives each
+feed a share of the budget proportional to ``sqrt(r)``.  Intervals are also capped so a
+feed is polled before its page can overflow, which would mean missed items.
+"""
+
+import collections
+import heapq
+import itertools
+import math
+import time
+
+from . import errors
+from .stream import Stream
+
+__all__ = ['PollScheduler', 'Feed']
+
+
+class Feed(object):
+    """The scheduling state of a single polled listing.
+
+    Attributes:
+        listing (str): The listing path being polled.
+        stream (Stream): The stream used to poll the listing.
+        rate (float): The estimated number of new items per second.
+        interval (float): The current number of seconds between polls.
+        stats (collections.Counter): Counts of ``polls`` and ``items``, along with the
+            ``latency`` summed over all items (the time from an item being created to
+            it being fetched) and the ``max_latency``.
+    """
+
+    def __init__(self, stream, callback, rate):
+        self.listing = stream.listing
+        self.stream = stream
+        self.callback = callback
+        self.rate = rate
+        self.interval = None
+        self.last_poll = None
+        self.stats = collections.Counter()
+
+    @property
+    def mean_latency(self):
+        if not self.stats['items']:
+            return None
+        return self.stats['latency'] / self.stats['items']
+
+
+class PollScheduler(object):
+    """Polls many feeds, sharing a request budget by their recent activity."""
+
+    def __init__(self, snoo, budget=None, min_interval=1, max_interval=600,
+                 smoothing=0.3, prior_rate=0.001, **stream_args):
+        """Create a scheduler with no feeds.
+
+        Arguments:
+            snoo (Snooble): An authorized snooble instance to make requests with.
+            budget (float): The number of polls per second to share out.  Defaults to
+                the rate allowed by the snooble instance's ratelimiter.
+            min_interval/max_interval (float): Bounds on the time between polls of any
+                one feed.
+            smoothing (float): The weight given to the latest poll when updating a
+                feed's estimated item rate.
+            prior_rate (float): The item rate assumed for a new feed, and the lowest
+                rate any feed is treated as having.
+            stream_args: Passed through to each feed's
+                :class:`~snooble.stream.Stream`.
+        """
+        if budget is None:
+            limiter = snoo._limiter
+            budget = limiter.bucket_size / limiter.refresh_period
+
+        self.snoo = snoo
+        self.budget = budget
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.smoothing = smoothing
+        self.prior_rate = prior_rate
+        self.stream_args = stream_args
+        self.feeds = collections.OrderedDict()
+        self._queue = []
+        self._counter = itertools.count()
+
+    def add(self, listing, callback=None, rate=None):
+        """Start polling a listing, passing lists of new items to ``callback``."""
+        stream = Stream(self.snoo, listing, **self.stream_args)
+        feed = Feed(stream, callback, rate if rate is not None else self.prior_rate)
+        self.feeds[listing] = feed
+        self._allocate()
+        self._schedule(feed, time.time())
+        return feed
+
+    def remove(self, listing):
+        # Entries for removed feeds are skipped when they reach the top of the queue.
+        del self.feeds[listing]
+        self._allocate()
+
+    def _schedule(self, feed, due):
+        heapq.heappush(self._queue, (due, next(self._counter), feed))
+
+    def _allocate(self):
+        weights = dict((listing, math.sqrt(max(feed.rate, self.prior_rate)))
+                       for listing, feed in self.feeds.items())
+        total = sum(weights.values())
+        for listing, feed in self.feeds.items():
+            interval = total / (self.budget * weights[listing])
+            overflow = feed.stream.limit * feed.stream.target_fill / max(feed.rate,
+                                                                         self.prior_rate)
+            feed.interval = max(self.min_interval,
+                                min(interval, overflow, self.max_interval))
+
+    def run_once(self):
+        """Wait for the next feed to be due, poll it, and return ``(feed, items)``.
+
+        Raises :class:`~snooble.errors.SnoobleError` if there are no feeds to poll.
+        """
+        while True:
+            if not self._queue:
+                raise errors.SnoobleError("There are no feeds to poll")
+            due, _, feed = heapq.heappop(self._queue)
+            if self.feeds.get(feed.listing) is feed:
+                break
+
+        now = time.time()
+        if due > now:
+            time.sleep(due - now)
+            now = due
+
+        items = feed.stream.poll()
+        self._record(feed, items, now)
+        self._allocate()
+        self._schedule(feed, now + feed.interval)
+
+        if items and feed.callback is not None:
+            feed.callback(items)
+        return feed, items
+
+    def _record(self, feed, items, now):
+        if feed.last_poll is not None:
+            sample = len(items) / max(now - feed.last_poll, 1e-6)
+            feed.rate = self.smoothing * sample + (1 - self.smoothing) * feed.rate
+        feed.last_poll = now
+
+        feed.stats['polls'] += 1
+        feed.stats['items'] += len(items)
+        for thing in items:
+            latency = max(now - thing.get('created_utc', now), 0)
+            feed.stats['latency'] += latency
+            feed.stats['max_latency'] = max(feed.stats['max_latency'], latency)
+
+    def run(self, polls=None):
+        """Poll feeds as they become due, forever or for a number of polls.
+
+        Stops early if every feed has been removed.
+        """
+        for _ in (range(polls) if polls is not None else itertools.count()):
+            if not self.feeds:
+                break
+            self.run_once()
+
+    def report(self):
+        """Return a dict of each listing's rate, interval, and latency statistics."""
+        return collections.OrderedDict(
+            (listing, {"rate": feed.rate, "interval": feed.interval,
+                       "polls": feed.stats['polls'], "items": feed.stats['items'],
+                       "mean_latency": feed.mean_latency,
+                       "max_latency": feed.stats['max_latency']})
+            for listing, feed in self.feeds.items())
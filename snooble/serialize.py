@@ -0,0 +1,71 @@
+"""Compact binary serialization for response objects.
+
+Pickling a response the generic way stores both the raw JSON and the wrapped data
+derived from it, so every item ends up in the output twice.  The functions here write the
+raw JSON payload exactly once, compressed, together with the name of the response class
+it should be rebuilt as.  Rebuilding goes back through the response class itself, so the
+result is indistinguishable from the response originally returned by the API.
+
+The format is a four byte magic number, a single byte giving the length of the class
+name, the class name itself, a byte giving the compression level, and then the payload
+encoded with :mod:`marshal` (zlib-compressed unless the level is ``0``).  The payload is
+plain JSON data, and marshal encodes and decodes that two to three times faster than the
+json module.  Marshal's format can change between Python versions, so data written by
+one version should not be expected to load in another, and like pickle it is not meant
+for data from untrusted sources.
+"""
+
+import marshal
+import zlib
+
+from . import responses
+
+__all__ = ['dumps', 'loads']
+
+MAGIC = b'SNB\x01'
+
+
+def _response_classes():
+    classes = {responses.Response.__name__: responses.Response}
+    classes.update((cls.__name__, cls) for cls in responses.RESPONSE_TYPES.values())
+    return classes
+
+
+def dumps(response, level=1):
+    """Serialize a response object to bytes.
+
+    Arguments:
+        response (BaseResponse): Any response object returned by snooble.
+        level (int): The zlib compression level to use, from ``0`` (no compression) to
+            ``9``.  Defaults to ``1``: Reddit's JSON is so repetitive that higher levels
+            only shrink it by another 10% or so, at up to twice the cost.  ``0`` is
+            fastest of all, but the output is around nine times larger.
+    """
+    name = type(response).__name__.encode('ascii')
+    if _response_classes().get(type(response).__name__) is not type(response):
+        raise TypeError("Cannot serialize unregistered response type {t!r}"
+                        .format(t=type(response)))
+
+    payload = marshal.dumps(response.json)
+    if level:
+        payload = zlib.compress(payload, level)
+    return b''.join((MAGIC, bytes((len(name), )), name, bytes((level, )), payload))
+
+
+def loads(data):
+    """Rebuild a response object from bytes created by :func:`dumps`."""
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Data was not created by snooble.serialize.dumps")
+
+    start = len(MAGIC) + 1
+    end = start + data[len(MAGIC)]
+    name = data[start:end].decode('ascii')
+    try:
+        cls = _response_classes()[name]
+    except KeyError:
+        raise ValueError("Unknown response type {name!r}".format(name=name))
+
+    payload = data[end + 1:]
+    if data[end]:
+        payload = zlib.decompress(payload)
+    return cls(marshal.loads(payload))
@@ -0,0 +1,201 @@
+"""Streams of new items from a listing.
+
+A :class:`Stream` repeatedly polls a listing such as ``r/python/new`` or
+``r/python/comments``, asking only for items newer than the last one it has seen, and
+yields each new item exactly once, oldest first.  The polling interval adapts to how
+quickly new items are appearing, so busy listings are polled often enough that pages
+don't overflow, and quiet listings don't waste requests.
+
+Polls with a ``before`` cursor get the items immediately after it, so even a full page
+is contiguous with what has already been seen; the stream just polls again quickly to
+work through the backlog.  Items can only be skipped over when the stream has to poll
+without a cursor (see ``resync_after``) and the page comes back full.  Reddit IDs are
+sequential base36 numbers, so the stream then knows exactly which IDs it might have
+missed: everything between the newest item it had already seen and the oldest item in
+the new page.  With ``backfill`` enabled, those IDs are fetched through
+:meth:`~snooble.Snooble.info` in batches of 100, and any that belong in the listing are
+yielded along with the rest of the poll.  IDs are shared between all subreddits, so for
+anything other than ``r/all`` most of a gap will belong to other subreddits; these are
+filtered out, and ``max_backfill`` bounds how many requests a single gap can cost.
+"""
+
+import collections
+import re
+import time
+
+from . import utils
+
+__all__ = ['Stream']
+
+
+class Stream(object):
+    """An iterator over new items in a listing.
+
+    Iterating over a stream blocks between polls and never finishes.  For more control,
+    call :meth:`poll` directly, which makes a single request and returns the new items,
+    and use :attr:`interval` to decide when to call it next.
+
+    Attributes:
+        interval (float): The number of seconds to wait before the next poll.
+        rate (float): The current estimate of new items per second.
+        stats (collections.Counter): Counts of ``polls``, ``items`` yielded,
+            ``full_pages`` (full polls without a cursor, where items may have been
+            missed), ``backlogged`` (full polls with a cursor, where more items are
+            waiting) and ``resyncs``.
+            When backfilling, also counts ``gaps`` found, the number of ``gap_ids`` in
+            them, how many of those IDs were ``checked`` or left ``unchecked`` because
+            of ``max_backfill``, and how many items were ``backfilled``.
+    """
+
+    def __init__(self, snoo, listing, limit=100, min_interval=1, max_interval=60,
+                 target_fill=0.5, smoothing=0.3, seen_size=10000, resync_after=10,
+                 backfill=False, max_backfill=1000, backfill_filter=None, **params):
+        """Create a stream over a listing.
+
+        Arguments:
+            snoo (Snooble): An authorized snooble instance to make requests with.
+            listing (str): The listing path, e.g. ``'r/python/new'``.
+            limit (int): How many items to ask for in each poll.  Defaults to ``100``.
+            min_interval/max_interval (float): Bounds on the time between polls.
+            target_fill (float): The fraction of a page that polls should aim to
+                return.  Lower values poll more often, leaving more headroom for bursts.
+            smoothing (float): The weight given to the latest poll when updating the
+                estimated item rate.
+            seen_size (int): How many recent fullnames to remember for deduplication.
+            resync_after (int): The ``before`` cursor stops working if the item it
+                points to is removed.  After this many empty polls in a row, the stream
+                polls once without a cursor, relying on deduplication instead.
+            backfill (bool): If ``True``, fetch the IDs skipped over when a poll
+                without a cursor comes back full.  Defaults to ``False``.
+            max_backfill (int): The most IDs to check for a single gap.  The newest IDs
+                in the gap are checked first.  Defaults to ``1000`` (ten requests).
+            backfill_filter (callable): Given a backfilled item, returns ``True`` if it
+                belongs in this stream.  By default, for ``r/<name>/...`` listings,
+                items are kept if they were posted to one of the named subreddits.
+            params: Any other parameters are passed along with every request.
+        """
+        self.snoo = snoo
+        self.listing = listing
+        self.limit = limit
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_fill = target_fill
+        self.smoothing = smoothing
+        self.resync_after = resync_after
+        self.params = params
+        self.backfill = backfill
+        self.max_backfill = max_backfill
+        self.backfill_filter = backfill_filter or _subreddit_filter(listing)
+
+        self.interval = min_interval
+        self.rate = None
+        self.before = None
+        self.stats = collections.Counter()
+        self._seen = utils.BoundedSet(seen_size)
+        self._empty_polls = 0
+        self._last_poll = None
+        self._newest_id = None
+
+    @property
+    def completeness(self):
+        """The fraction of skipped-over IDs that have been checked, or ``1.0``."""
+        if not self.stats['gap_ids']:
+            return 1.0
+        return self.stats['checked'] / self.stats['gap_ids']
+
+    def poll(self):
+        """Make a single request, returning any new items, oldest first."""
+        params = dict(self.params, limit=self.limit)
+        cursor = self.before is not None and self._empty_polls < self.resync_after
+        if cursor:
+            params['before'] = self.before
+        elif self.before is not None:
+            self.stats['resyncs'] += 1
+            self._empty_polls = 0
+
+        now = time.perf_counter()
+        page = list(self.snoo.get(self.listing, **params))
+        full = len(page) >= self.limit
+        new = [thing for thing in reversed(page) if thing.fullname not in self._seen]
+        # A full page fetched with a cursor starts right after it, so nothing was missed
+        if full and not cursor and self.backfill and new:
+            new = self._backfill(page) + new
+
+        for thing in new:
+            self._seen.add(thing.fullname)
+        if self.backfill and new:
+            newest = max(utils.split_fullname(thing.fullname)[1] for thing in new)
+            self._newest_id = max(newest, self._newest_id or newest)
+
+        self.stats['polls'] += 1
+        self.stats['items'] += len(new)
+        if new:
+            self.before = new[-1].fullname
+            self._empty_polls = 0
+        else:
+            self._empty_polls += 1
+
+        if full and cursor:
+            self.stats['backlogged'] += 1
+        elif full:
+            self.stats['full_pages'] += 1
+        self._adapt(now, len(new), full)
+        return new
+
+    def _backfill(self, page):
+        if self._newest_id is None:
+            return []
+
+        kind, oldest = min(utils.split_fullname(thing.fullname) for thing in page)
+        if oldest <= self._newest_id + 1:
+            return []
+
+        # Everything strictly between what we'd already seen and this page is unknown.
+        gap = range(oldest - 1, self._newest_id, -1)
+        checked = gap[:self.max_backfill]
+        self.stats['gaps'] += 1
+        self.stats['gap_ids'] += len(gap)
+        self.stats['checked'] += len(checked)
+        self.stats['unchecked'] += len(gap) - len(checked)
+
+        found = self.snoo.info([utils.join_fullname(kind, n) for n in reversed(checked)])
+        found = [thing for thing in found if thing is not None and
+                 thing.fullname not in self._seen and self.backfill_filter(thing)]
+        self.stats['backfilled'] += len(found)
+        return found
+
+    def _adapt(self, now, count, full):
+        if self._last_poll is not None:
+            sample = count / max(now - self._last_poll, 1e-6)
+            if self.rate is None:
+                self.rate = sample
+            else:
+                self.rate = self.smoothing * sample + (1 - self.smoothing) * self.rate
+        self._last_poll = now
+
+        if full:
+            # With a cursor, more items are waiting right after this page; without one,
+            # some may already have been missed.  Either way, catch up as fast as
+            # allowed: the next poll has a cursor, so it can't miss anything else.
+            interval = self.min_interval
+        elif self.rate:
+            interval = self.limit * self.target_fill / self.rate
+        else:
+            interval = self.interval * 2
+
+        self.interval = min(max(interval, self.min_interval), self.max_interval)
+
+    def __iter__(self):
+        while True:
+            for thing in self.poll():
+                yield thing
+            time.sleep(self.interval)
+
+
+def _subreddit_filter(listing):
+    match = re.match(r'/?r/([^/]+)', listing)
+    if match is None or match.group(1).lower() == 'all':
+        return lambda thing: True
+
+    names = set(name.lower() for name in match.group(1).split('+'))
+    return lambda thing: thing.get('subreddit', '').lower() in names
@@ -0,0 +1,152 @@
+"""Incremental syncing of listings.
+
+Re-crawling a whole user history or subreddit listing every night is wasteful when only
+a handful of items have changed.  :class:`ListingSync` saves a checkpoint for each
+listing it syncs: the creation time of the newest item seen (the high-water mark), and
+the scores of recent items.  The next sync pages through the listing only until it has
+passed both the high-water mark and the recent window, and returns just what changed.
+
+If ``max_pages`` stops a sync before it gets back to the high-water mark, the mark is
+left where it was and the ``after`` cursor of the last page is saved instead, so that the
+next sync resumes from there rather than skipping the items in between.
+"""
+
+import collections
+import time
+
+from . import utils
+
+__all__ = ['ListingSync', 'SyncDelta']
+
+SyncDelta = collections.namedtuple('SyncDelta', ['added', 'rescored', 'requests'])
+SyncDelta.__doc__ = """The changes found by a sync.
+
+``added`` holds items created since the last sync, newest first.  ``rescored`` holds
+items within the recent window whose score has changed since it was last recorded.
+``requests`` is the number of pages that were fetched.
+"""
+
+
+class _FileStore(object):
+    # A minimal mapping of listing -> checkpoint, saved to a JSON file on every change.
+
+    def __init__(self, path):
+        self.path = path
+        self._data = utils.load_json(path, default={})
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+        utils.save_json(self.path, self._data)
+
+
+class ListingSync(object):
+    """Fetches only what has changed in listings since they were last synced.
+
+    Listings must be sorted newest first (e.g. ``r/python/new`` or
+    ``user/spez/submitted`` with ``sort='new'``).
+    """
+
+    def __init__(self, snoo, store, recent_window=24 * 60 * 60, limit=100,
+                 max_pages=None):
+        """Create a syncer.
+
+        Arguments:
+            snoo (Snooble): An authorized snooble instance to make requests with.
+            store: Where to keep checkpoints.  Either the path of a JSON file, or any
+                object with ``get`` and ``__setitem__`` such as a dict or a ``shelve``.
+            recent_window (float): Items created within this many seconds are checked
+                for score changes.  Defaults to one day.
+            limit (int): How many items to request per page.
+            max_pages (int): The most pages to fetch in one sync, or ``None`` for no
+                limit.  Mostly useful for the first sync of a long listing.  A later
+                sync that runs out of pages before reaching the high-water mark is
+                carried on by the next one.
+        """
+        self.snoo = snoo
+        self.store = _FileStore(store) if isinstance(store, str) else store
+        self.recent_window = recent_window
+        self.limit = limit
+        self.max_pages = max_pages
+
+    def checkpoint(self, listing):
+        """Return the saved checkpoint for a listing, or ``None``."""
+        return self.store.get(listing)
+
+    def sync(self, listing, **params):
+        """Sync a listing, saving a new checkpoint and returning a :class:`SyncDelta`.
+
+        Any extra keyword arguments are passed as parameters with every request.
+        """
+        saved = self.store.get(listing) or {}
+        high_water = saved.get('high_water')
+        at_high_water = set(saved.get('at_high_water', ()))
+        old_recent = saved.get('recent', {})
+        cutoff = time.time() - self.recent_window
+
+        added, rescored, recent = [], [], {}
+        # A sync that was cut short carries on from its cursor, with the newest item it
+        # had seen becoming the mark once it's back to the old one.
+        resume = saved.get('resume')
+        if resume:
+            after = resume['after']
+            newest, at_newest = resume['high_water'], set(resume['at_high_water'])
+        else:
+            after = None
+            newest, at_newest = high_water, set(at_high_water)
+        pages, finished = 0, False
+
+        while self.max_pages is None or pages < self.max_pages:
+            page_params = dict(params, limit=self.limit)
+            if after is not None:
+                page_params['after'] = after
+            page = self.snoo.get(listing, **page_params)
+            pages += 1
+
+            finished = False
+            for thing in page:
+                created, score = thing['created_utc'], thing.get('score')
+                is_new = (high_water is None or created > high_water or
+                          (created == high_water and thing.fullname not in at_high_water))
+                if not is_new and created < cutoff:
+                    # Older than both the high-water mark and the window, so everything
+                    # after this has already been seen and is too old to rescore.
+                    finished = True
+                    break
+
+                if is_new:
+                    added.append(thing)
+                elif thing.fullname in old_recent and \
+                        old_recent[thing.fullname][1] != score:
+                    rescored.append(thing)
+
+                if created >= cutoff:
+                    recent[thing.fullname] = [created, score]
+                if newest is None or created > newest:
+                    newest, at_newest = created, set([thing.fullname])
+                elif created == newest:
+                    at_newest.add(thing.fullname)
+
+            after = page.json['data'].get('after')
+            if finished or after is None or not len(page):
+                break
+
+        # Recent items that weren't reached this time (e.g. because of max_pages) keep
+        # their old scores until they fall out of the window.
+        for fullname, (created, score) in old_recent.items():
+            if created >= cutoff:
+                recent.setdefault(fullname, [created, score])
+
+        if not finished and after is not None and high_water is not None:
+            # Stopped by max_pages before getting back to the old mark, so new items may
+            # still be waiting on the pages that weren't fetched.
+            self.store[listing] = {
+                "high_water": high_water, "at_high_water": sorted(at_high_water),
+                "recent": recent, "resume": {"after": after, "high_water": newest,
+                                             "at_high_water": sorted(at_newest)}}
+        else:
+            self.store[listing] = {"high_water": newest,
+                                   "at_high_water": sorted(at_newest), "recent": recent}
+        return SyncDelta(added=added, rescored=rescored, requests=pages)
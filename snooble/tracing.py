@@ -0,0 +1,111 @@
+"""Per-request timing records.
+
+When a request is slow, it's useful to know whether the time went on waiting for the
+ratelimiter, on the network, or on turning the body into response objects.  Functions
+registered with :meth:`~snooble.Snooble.add_trace_hook` are called with a
+:class:`TraceRecord` after every request, breaking its time down into phases.  While no
+hooks are registered, requests skip all of this and take the usual path.
+"""
+
+import collections
+import json
+import threading
+import time
+
+from . import responses
+
+__all__ = ['TraceRecord', 'TraceCollector', 'PHASES']
+
+PHASES = ('limiter_wait', 'connect', 'ttfb', 'body_read', 'decode', 'build')
+
+TraceRecord = collections.namedtuple(
+    'TraceRecord', ('method', 'url', 'status', 'start') + PHASES + ('total',))
+TraceRecord.__doc__ = """The timings of a single request, in seconds.
+
+``start`` is the :func:`time.perf_counter` value when the request began.  The phases are
+``limiter_wait`` (in :meth:`~snooble.ratelimit.RateLimiter.take`), ``ttfb`` (sending
+the request until the response headers arrive, including connecting), ``body_read``,
+``decode`` (parsing the JSON), and ``build`` (creating response objects).  ``connect``
+is always ``None``, as requests does not report connection time separately.  Phases that
+didn't happen, such as decoding a raw request, are also ``None``; when a decode executor
+is used, ``decode`` covers both decoding and building.
+"""
+
+
+def traced_call(snoo, method, url, kwargs, raw=False):
+    """Make a request for ``snoo`` the same way it usually would, while timing it."""
+    start = time.perf_counter()
+    url, headers = snoo._prepare(url)
+    snoo._limiter.take()
+    limited = time.perf_counter()
+
+    response = snoo._transport.request(method, url, headers=headers, stream=True,
+                                       **kwargs)
+    first_byte = time.perf_counter()
+    if raw:
+        body = response.raw.read(decode_content=False)
+    else:
+        body = response.content
+    read = time.perf_counter()
+
+    decode = build = None
+    result = None
+    if raw:
+        from .core import RawResponse
+        result = RawResponse(status=response.status_code, headers=response.headers,
+                             body=body)
+    elif response.status_code < 400 and body:
+        if snoo.decode_executor is not None:
+            result = snoo._build_response(response)
+            decode = time.perf_counter() - read
+        else:
+            data = json.loads(body.decode('utf-8'))
+            decoded = time.perf_counter()
+            result = responses.create_response(data, snoo.identity_map)
+            decode, build = decoded - read, time.perf_counter() - decoded
+
+    end = time.perf_counter()
+    record = TraceRecord(method=method, url=url, status=response.status_code, start=start,
+                         limiter_wait=limited - start, connect=None,
+                         ttfb=first_byte - limited, body_read=read - first_byte,
+                         decode=decode, build=build, total=end - start)
+    for hook in list(snoo._trace_hooks):
+        hook(record)
+
+    if not raw:
+        snoo._check(method, url, response)
+    return result
+
+
+class TraceCollector(object):
+    """A trace hook that keeps running totals for each phase.
+
+    Example::
+
+        collector = TraceCollector()
+        snoo.add_trace_hook(collector)
+        ...
+        print(collector.summary())
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.totals = collections.Counter()
+        self.maximums = collections.Counter()
+
+    def __call__(self, record):
+        with self._lock:
+            self.count += 1
+            for phase in PHASES + ('total',):
+                value = getattr(record, phase)
+                if value is not None:
+                    self.totals[phase] += value
+                    self.maximums[phase] = max(self.maximums[phase], value)
+
+    def summary(self):
+        """Return ``{phase: {'mean': ..., 'max': ...}}`` for every phase recorded."""
+        with self._lock:
+            return dict((phase, {"mean": self.totals[phase] / self.count,
+                                 "max": self.maximums[phase]})
+                        for phase in self.totals)
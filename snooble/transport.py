@@ -0,0 +1,206 @@
+"""Pluggable HTTP transports.
+
+:class:`~snooble.Snooble` does all the work of building a request itself (resolving the
+url, adding the authorization header and waiting for the ratelimiter) and parsing the
+response afterwards, and only hands a transport the job of sending the request.  Which
+transport is used can be chosen for each ``Snooble``::
+
+    snoo = Snooble(useragent, transport=Urllib3Transport(maxsize=10))
+
+:class:`RequestsTransport` (the default) sends requests with a ``requests.Session``.
+:class:`Urllib3Transport` talks to a ``urllib3.PoolManager`` directly, skipping the
+hooks, settings merging and cookie handling that ``requests`` does for every request,
+which is a noticeable share of the CPU time at high request rates.
+:class:`AsyncioTransport` wraps either of them for use with Snooble's coroutine methods
+(:meth:`~snooble.Snooble.aget` and friends).
+
+A transport needs a ``headers`` dict, sent with every request, and a
+``request(method, url, headers=None, params=None, data=None, stream=False)`` method
+returning an object with the ``status_code``, ``headers``, ``content``, ``raw`` and
+``json()`` of a ``requests.Response``.  Authorization always goes through the
+``Snooble``'s requests session, whichever transport is used.  Transports can also have
+a ``connection_pool(url)`` method, returning the urllib3 connection pool that requests to
+``url`` will use, so that :meth:`~snooble.Snooble.warmup` can open connections early,
+and an ``after_fork()`` method, called in the child process after a fork to drop any
+connections shared with the parent.  That has to be done without taking any locks,
+which another thread may have held when the process forked, so the pools are abandoned
+rather than closed.
+"""
+
+import copy
+import json
+from concurrent import futures
+from urllib import parse as urlp
+
+__all__ = ['RequestsTransport', 'Urllib3Transport', 'AsyncioTransport']
+
+# Pool managers replaced in a forked child.  Their pools' finalizers would take locks that
+# another thread may have held at the time of the fork, so they're never collected.
+_abandoned = []
+
+
+class RequestsTransport(object):
+    """Sends requests using a ``requests.Session``.
+
+    Arguments:
+        session: The session (or an object with the same ``get``/``post``/``put``/
+            ``delete`` methods, such as a :class:`~snooble.replay.ReplaySession`) to
+            use.  Defaults to a new ``requests.Session``.
+    """
+
+    def __init__(self, session=None):
+        if session is None:
+            import requests
+            session = requests.Session()
+        self.session = session
+
+    @property
+    def headers(self):
+        return self.session.headers
+
+    def request(self, method, url, headers=None, **kwargs):
+        return getattr(self.session, method.lower())(url, headers=headers, **kwargs)
+
+    def connection_pool(self, url):
+        import requests
+        # The proxy and TLS settings are part of the pool's key, so the pool has to be
+        # looked up the same way requests does it when sending, including any settings
+        # from the environment (e.g. REQUESTS_CA_BUNDLE).
+        settings = self.session.merge_environment_settings(
+            url, {}, None, self.session.verify, self.session.cert)
+        adapter = self.session.get_adapter(url)
+        if not hasattr(adapter, 'get_connection_with_tls_context'):
+            return adapter.get_connection(url, settings['proxies'])
+        request = requests.Request('GET', url).prepare()
+        return adapter.get_connection_with_tls_context(
+            request, settings['verify'], proxies=settings['proxies'],
+            cert=settings['cert'])
+
+    def after_fork(self):
+        # Clearing the old pools could deadlock, so new pool managers are built instead
+        for adapter in getattr(self.session, 'adapters', {}).values():
+            if hasattr(adapter, 'init_poolmanager'):
+                _abandoned.append((adapter.poolmanager, adapter.proxy_manager))
+                adapter.proxy_manager = {}
+                adapter.init_poolmanager(adapter._pool_connections, adapter._pool_maxsize,
+                                         block=adapter._pool_block)
+
+    def close(self):
+        self.session.close()
+
+
+class Urllib3Response(object):
+    """The parts of a ``requests.Response`` that snooble uses, for a urllib3 response."""
+
+    __slots__ = ('raw', '_content')
+
+    def __init__(self, raw):
+        self.raw = raw
+        self._content = None
+
+    @property
+    def status_code(self):
+        return self.raw.status
+
+    @property
+    def headers(self):
+        return self.raw.headers
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = self.raw.data
+        return self._content
+
+    def json(self):
+        return json.loads(self.content.decode('utf-8'))
+
+
+class Urllib3Transport(object):
+    """Sends requests straight through a ``urllib3.PoolManager``.
+
+    Arguments:
+        pool_manager: The pool manager to use.  If not given, one is created, with any
+            other keyword arguments (e.g. ``maxsize``) passed to it.
+    """
+
+    def __init__(self, pool_manager=None, **pool_kwargs):
+        if pool_manager is None:
+            import urllib3
+            pool_manager = urllib3.PoolManager(**pool_kwargs)
+        self.pool_manager = pool_manager
+        self.headers = {"Accept-Encoding": "gzip, deflate", "Accept": "*/*"}
+
+    def request(self, method, url, headers=None, params=None, data=None, stream=False):
+        if params:
+            url += ('&' if '?' in url else '?') + urlp.urlencode(params)
+
+        all_headers = dict(self.headers)
+        if headers:
+            all_headers.update(headers)
+        body = None
+        if data is not None:
+            body = urlp.urlencode(data)
+            all_headers['Content-Type'] = 'application/x-www-form-urlencoded'
+
+        # Like requests, never retry (urllib3 would otherwise sleep on a 429's
+        # Retry-After) or follow redirects.
+        raw = self.pool_manager.urlopen(method.upper(), url, body=body,
+                                        headers=all_headers, retries=False,
+                                        preload_content=not stream)
+        return Urllib3Response(raw)
+
+    def connection_pool(self, url):
+        return self.pool_manager.connection_from_url(url)
+
+    def after_fork(self):
+        # Clearing the old pools could deadlock, so the pool manager is replaced by a
+        # copy (keeping its settings, and its proxy if it's a ProxyManager) that has a
+        # new, empty pool container.
+        old = self.pool_manager
+        _abandoned.append(old)
+        self.pool_manager = copy.copy(old)
+        self.pool_manager.pools = type(old.pools)(old.pools._maxsize,
+                                                  dispose_func=old.pools.dispose_func)
+
+    def close(self):
+        self.pool_manager.clear()
+
+
+class AsyncioTransport(object):
+    """Wraps another transport so that Snooble's coroutine methods can use it.
+
+    The blocking requests are made in ``executor``, so they don't block the event loop,
+    and any number of them can be awaited at once (up to the executor's size).
+
+    Arguments:
+        transport: The transport to wrap.  Defaults to a :class:`RequestsTransport`.
+        executor: The executor to make requests in.  Defaults to a thread pool with
+            ``workers`` threads.
+    """
+
+    def __init__(self, transport=None, executor=None, workers=10):
+        self.transport = transport if transport is not None else RequestsTransport()
+        self._workers = workers if executor is None else None
+        self.executor = (executor if executor is not None
+                         else futures.ThreadPoolExecutor(workers))
+
+    @property
+    def headers(self):
+        return self.transport.headers
+
+    def request(self, method, url, headers=None, **kwargs):
+        return self.transport.request(method, url, headers=headers, **kwargs)
+
+    def connection_pool(self, url):
+        return self.transport.connection_pool(url)
+
+    def after_fork(self):
+        self.transport.after_fork()
+        # An executor's threads don't survive a fork, so one this created is replaced
+        if self._workers is not None:
+            self.executor = futures.ThreadPoolExecutor(self._workers)
+
+    def close(self):
+        self.transport.close()
+        self.executor.shutdown(wait=False)
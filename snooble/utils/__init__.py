@@ -1,3 +1,12 @@
+import collections
+import itertools
+import json
+import os
+import string
+
+BASE36_DIGITS = string.digits + string.ascii_lowercase
+
+
 def fetch_parameter(kwargs, param):
     """Fetch a parameter from a keyword-argument dict
 
@@ -30,3 +39,93 @@ def strlist(list_or_string):
         return [list_or_string]
     else:
         return list_or_string
+
+
+def chunked(iterable, size):
+    """Split an iterable into lists of at most ``size`` items
+
+    The final list may be shorter than ``size``, but will never be empty.  Works lazily,
+    so it can be used on infinite iterators.
+    """
+    iterator = iter(iterable)
+    chunk = list(itertools.islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(itertools.islice(iterator, size))
+
+
+class BoundedSet(object):
+    """A set that only remembers the most recently added ``capacity`` items
+
+    Adding an item when the set is full forgets the oldest item, so memory use stays
+    fixed however many items pass through it.  Used for deduplicating streams.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._order = collections.deque()
+        self._items = set()
+
+    def add(self, item):
+        if item in self._items:
+            return
+        if len(self._order) >= self.capacity:
+            self._items.discard(self._order.popleft())
+        self._order.append(item)
+        self._items.add(item)
+
+    def __contains__(self, item):
+        return item in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+
+def base36_decode(digits):
+    """Convert a base36 string (as used in Reddit IDs) into an integer"""
+    return int(digits, 36)
+
+
+def base36_encode(number):
+    """Convert a non-negative integer into a lowercase base36 string"""
+    if number < 0:
+        raise ValueError("Cannot base36-encode negative number {n}".format(n=number))
+
+    digits = []
+    while True:
+        number, digit = divmod(number, 36)
+        digits.append(BASE36_DIGITS[digit])
+        if not number:
+            return "".join(reversed(digits))
+
+
+def split_fullname(fullname):
+    """Split a fullname such as ``'t3_abc'`` into its kind and integer ID"""
+    kind, _, digits = fullname.partition('_')
+    return kind, base36_decode(digits)
+
+
+def join_fullname(kind, number):
+    """The inverse of split_fullname"""
+    return "{kind}_{id}".format(kind=kind, id=base36_encode(number))
+
+
+def load_json(path, default=None):
+    """Load JSON from a file, returning ``default`` if the file doesn't exist"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def save_json(path, data):
+    """Write JSON to a file atomically
+
+    The data is written to a temporary file next to ``path`` which then replaces it, so
+    a crash part way through never leaves a half-written file behind.
+    """
+    temp = path + '.tmp'
+    with open(temp, 'w') as f:
+        json.dump(data, f)
+    os.replace(temp, path)
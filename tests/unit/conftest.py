@@ -0,0 +1,27 @@
+import snooble
+from snooble import mockserver
+
+from unittest import mock
+
+import pytest
+
+
+@pytest.fixture
+def server():
+    with mockserver.MockReddit(post_rate=0.001) as server:
+        yield server
+
+
+@pytest.fixture
+def session():
+    # Test modules override this with a session that returns their responses
+    return mock.Mock()
+
+
+@pytest.fixture
+def snoo(session):
+    snoo = snooble.Snooble('my-test-useragent', ratelimit=(1000, 1), session=session)
+    snoo.oauth(snooble.oauth.IMPLICIT_KIND, scopes=['read'],
+               client_id='ThisIsTheClientID', redirect_uri='https://my.site.com')
+    snoo.authorize('my-token')
+    return snoo
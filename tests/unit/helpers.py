@@ -0,0 +1,25 @@
+"""Helpers shared between the unit tests."""
+
+import snooble
+
+
+def connect(server, **kwargs):
+    """Return a Snooble authorized against a running MockReddit ``server``."""
+    kwargs.setdefault('ratelimit', (1000, 1))
+    snoo = snooble.Snooble('snooble tests', www_domain=server.url,
+                           auth_domain=server.url, **kwargs)
+    snoo.oauth(snooble.oauth.SCRIPT_KIND, scopes=['read'], client_id='ClientID',
+               secret_id='SecretID', username='my-username', password='my-password')
+    snoo.authorize()
+    return snoo
+
+
+def thing(kind, id, **data):
+    """Return the raw JSON of a thing of ``kind``, with its id and fullname set."""
+    data.update(id=id, name="{k}_{i}".format(k=kind, i=id))
+    return {"kind": kind, "data": data}
+
+
+def listing(*children):
+    """Return the raw JSON of a listing of ``children``."""
+    return {"kind": "Listing", "data": {"children": list(children)}}
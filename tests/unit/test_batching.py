@@ -0,0 +1,92 @@
+from snooble import batching, responses
+
+import threading
+from unittest import mock
+
+import pytest
+
+
+def fake_info(url, id=None, sr_name=None):
+    if id is not None:
+        children = [{"kind": "t3", "data": {"name": name}}
+                    for name in id.split(',') if not name.endswith('missing')]
+    else:
+        children = [{"kind": "t5", "data": {"display_name": name.title()}}
+                    for name in sr_name.split(',')]
+    return responses.create_response({"kind": "Listing", "data": {"children": children}})
+
+
+@pytest.fixture
+def snoo():
+    snoo = mock.Mock()
+    snoo.get.side_effect = fake_info
+    return snoo
+
+
+class TestBatchCollector(object):
+
+    def test_collects_within_window(self, snoo):
+        with batching.BatchCollector(snoo, window=10) as collector:
+            first = collector.get_thing('t3_a')
+            second = collector.get_thing('t3_b')
+            missing = collector.get_thing('t3_missing')
+            again = collector.get_thing('t3_a')
+
+        assert snoo.get.call_count == 1
+        assert snoo.get.call_args == mock.call('api/info', id='t3_a,t3_b,t3_missing')
+        assert first.result().fullname == 't3_a'
+        assert second.result().fullname == 't3_b'
+        assert missing.result() is None
+        assert again.result() is first.result()
+
+    def test_sends_after_window(self, snoo):
+        collector = batching.BatchCollector(snoo, window=0.01)
+        future = collector.get_thing('t3_a')
+        assert future.result(timeout=5).fullname == 't3_a'
+        collector.close()
+
+    def test_sends_full_batches_immediately(self, snoo):
+        collector = batching.BatchCollector(snoo, window=60, max_size=3)
+        results = [collector.get_thing('t3_{i}'.format(i=i)) for i in range(7)]
+
+        for future in results[:6]:
+            assert future.result(timeout=5) is not None
+        assert not results[6].done()
+        collector.close()
+
+        assert [len(c[1]['id'].split(',')) for c in snoo.get.call_args_list] == [3, 3, 1]
+
+    def test_subreddits(self, snoo):
+        with batching.BatchCollector(snoo) as collector:
+            sub = collector.get_subreddit('Python')
+            thing = collector.get_thing('t3_a')
+
+        assert sub.result()['display_name'] == 'Python'
+        assert thing.result().fullname == 't3_a'
+        assert mock.call('api/info', sr_name='python') in snoo.get.call_args_list
+
+    def test_errors_are_passed_to_every_caller(self, snoo):
+        snoo.get.side_effect = ValueError("oops")
+        with batching.BatchCollector(snoo) as collector:
+            results = [collector.get_thing('t3_a'), collector.get_thing('t3_b')]
+
+        for future in results:
+            with pytest.raises(ValueError):
+                future.result()
+
+    def test_many_threads(self, snoo):
+        collector = batching.BatchCollector(snoo, window=0.05)
+        results = {}
+
+        def lookup(i):
+            results[i] = collector.get_thing('t3_{i}'.format(i=i)).result(timeout=5)
+
+        threads = [threading.Thread(target=lookup, args=(i,)) for i in range(50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        collector.close()
+
+        assert snoo.get.call_count < 50
+        assert all(results[i].fullname == 't3_{i}'.format(i=i) for i in range(50))
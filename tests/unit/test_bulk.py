@@ -0,0 +1,100 @@
+from snooble import bulk, errors
+
+import sys
+import time  # used to monkeypatch this module
+from unittest import mock
+
+import pytest
+import requests
+import urllib3
+
+
+def reddit_error(status, **headers):
+    return errors.RedditError("failed", response=mock.Mock(status_code=status,
+                                                           headers=headers))
+
+
+@pytest.fixture
+def sleep(monkeypatch):
+    sleep = mock.Mock()
+    monkeypatch.setattr(time, 'sleep', sleep)
+    return sleep
+
+
+class TestBulkExecutor(object):
+
+    def test_runs_actions(self, sleep):
+        snoo = mock.Mock()
+        snoo.post.side_effect = lambda url, **kwargs: kwargs['id']
+        progress = mock.Mock()
+
+        with bulk.BulkExecutor(snoo, workers=4, on_progress=progress) as executor:
+            results = [executor.submit('post', 'api/approve', id=i) for i in range(20)]
+
+        assert [r.result() for r in results] == list(range(20))
+        assert snoo.post.call_count == 20
+        assert executor.progress == {'submitted': 20, 'completed': 20, 'failed': 0,
+                                     'pending': 0, 'retries': 0}
+        assert progress.call_count == 20
+        assert not sleep.called
+
+    def test_retries_temporary_errors(self, sleep):
+        snoo = mock.Mock()
+        snoo.post.side_effect = [reddit_error(503), requests.ConnectionError(),
+                                 reddit_error(429, **{'Retry-After': '7'}),
+                                 urllib3.exceptions.ProtocolError(), 'done']
+
+        with bulk.BulkExecutor(snoo, retries=4, backoff=2) as executor:
+            result = executor.submit('post', 'api/remove', id='t3_a')
+
+        assert result.result() == 'done'
+        assert sleep.call_args_list == [mock.call(2), mock.call(4), mock.call(7.0),
+                                        mock.call(16)]
+        assert executor.progress['retries'] == 4
+        assert executor.failures == []
+
+    def test_api_errors(self, sleep):
+        snoo = mock.Mock()
+        ratelimited = {"json": {"errors": [["RATELIMIT", "try again in 9 seconds",
+                                            "ratelimit"]], "ratelimit": 9.5}}
+        denied = {"json": {"errors": [["SUBREDDIT_NOTALLOWED", "not allowed", "sr"]]}}
+        done = {"json": {"errors": [], "data": {}}}
+        snoo.post.side_effect = [ratelimited, done, denied]
+
+        with bulk.BulkExecutor(snoo, retries=3) as executor:
+            first = executor.submit('post', 'api/submit', sr='a')
+            second = executor.submit('post', 'api/submit', sr='b')
+
+        assert first.result() == done
+        assert sleep.call_args_list == [mock.call(9.5)]
+        with pytest.raises(errors.APIError) as e:
+            second.result()
+        assert e.value.codes == ['SUBREDDIT_NOTALLOWED']
+        assert executor.progress == {'submitted': 2, 'completed': 1, 'failed': 1,
+                                     'pending': 0, 'retries': 1}
+
+    def test_reports_failures(self, sleep):
+        snoo = mock.Mock()
+        forbidden = reddit_error(403)
+        snoo.post.side_effect = [forbidden, reddit_error(500), reddit_error(500)]
+
+        with bulk.BulkExecutor(snoo, retries=1) as executor:
+            first = executor.submit('post', 'api/remove', id='t3_a')
+            second = executor.submit('post', 'api/remove', id='t3_b')
+
+        with pytest.raises(errors.RedditError):
+            first.result()
+        with pytest.raises(errors.RedditError):
+            second.result()
+
+        assert executor.failures[0] == (bulk.Action('post', 'api/remove',
+                                                    {'id': 't3_a'}), forbidden)
+        assert len(executor.failures) == 2
+        assert executor.progress['failed'] == 2
+        assert executor.progress['retries'] == 1
+
+    def test_urllib3_is_optional(self, monkeypatch):
+        # An import of None in sys.modules raises ImportError
+        monkeypatch.setitem(sys.modules, 'urllib3', None)
+        assert bulk._is_temporary(requests.ConnectionError())
+        assert not bulk._is_temporary(ValueError())
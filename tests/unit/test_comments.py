@@ -0,0 +1,205 @@
+from snooble import comments, errors, responses
+
+import sys
+from unittest import mock
+
+import pytest
+
+
+def comment(id, *replies, **data):
+    data.update(id=id, name="t1_" + id, body="comment " + id)
+    data["replies"] = listing(*replies) if replies else ""
+    return {"kind": "t1", "data": data}
+
+
+def flat(id, parent):
+    return comment(id, parent_id=parent, link_id='t3_link')
+
+
+def stub(parent, *ids):
+    return {"kind": "more", "data": {"children": list(ids), "count": len(ids),
+                                     "name": "t1_" + (ids[0] if ids else '_'),
+                                     "parent_id": parent}}
+
+
+def more(*ids):
+    return {"kind": "more", "data": {"children": list(ids), "count": len(ids)}}
+
+
+def listing(*children):
+    return {"kind": "Listing", "data": {"children": list(children)}}
+
+
+@pytest.fixture
+def thread():
+    return listing(
+        comment('a',
+                comment('b', comment('c')),
+                comment('d'),
+                more('x', 'y')),
+        comment('e'),
+        more('z'))
+
+
+class TestCommentTree(object):
+
+    def test_preorder_layout(self, thread):
+        tree = comments.CommentTree(thread)
+        assert len(tree) == 5
+        assert [c['id'] for c in tree] == ['a', 'b', 'c', 'd', 'e']
+        assert list(tree.parents) == [-1, 0, 1, 0, -1]
+        assert list(tree.depths) == [0, 1, 2, 1, 0]
+        assert type(tree[0]) is responses.Response
+
+    def test_navigation(self, thread):
+        tree = comments.CommentTree(thread)
+        assert tree.roots() == [0, 4]
+        assert tree.children(0) == [1, 3]
+        assert tree.children(2) == []
+        assert tree.ancestors(2) == [1, 0]
+        assert tree.index('t1_d') == 3 and 't1_d' in tree
+
+    def test_subtrees(self, thread):
+        tree = comments.CommentTree(thread)
+        assert list(tree.subtree(0)) == [0, 1, 2, 3]
+        assert tree.descendant_count(0) == 3
+        assert tree.descendant_count(1) == 1
+        assert tree.descendant_count(4) == 0
+        assert [c['id'] for c in tree[1:3]] == ['b', 'c']
+
+    def test_more_stubs(self, thread):
+        tree = comments.CommentTree(thread)
+        assert tree.more == [(0, {"children": ['x', 'y'], "count": 2}),
+                             (-1, {"children": ['z'], "count": 1})]
+
+    def test_accepts_comments_endpoint_and_responses(self, thread):
+        link = listing({"kind": "t3", "data": {"id": "l", "name": "t3_l"}})
+        assert len(comments.CommentTree([link, thread])) == 5
+        assert len(comments.CommentTree(responses.create_response([link, thread]))) == 5
+        assert len(comments.CommentTree(responses.create_response(thread))) == 5
+
+    def test_deep_thread_does_not_recurse(self):
+        depth = sys.getrecursionlimit() * 2
+        node = comment(str(depth))
+        for i in reversed(range(depth)):
+            node = comment(str(i), node)
+
+        tree = comments.CommentTree(listing(node))
+        assert len(tree) == depth + 1
+        assert tree.depths[-1] == depth
+        assert tree.descendant_count(0) == depth
+
+
+class TestSplice(object):
+
+    def test_splices_under_parents(self, thread):
+        tree = comments.CommentTree(thread)
+        x_and_y = tree.more[0][1]
+        tree.splice([flat('x', 't1_a'), flat('y', 't1_x'), flat('w', 't3_link')],
+                    expanded=[x_and_y])
+
+        assert [c['id'] for c in tree] == ['a', 'b', 'c', 'd', 'x', 'y', 'e', 'w']
+        assert list(tree.parents) == [-1, 0, 1, 0, 0, 4, -1, -1]
+        assert list(tree.depths) == [0, 1, 2, 1, 1, 2, 0, 0]
+        assert tree.descendant_count(0) == 5
+        assert tree.index('t1_y') == 5
+        assert tree.more == [(-1, {"children": ['z'], "count": 1})]
+
+    def test_splice_keeps_unexpanded_stubs_and_adds_new_ones(self, thread):
+        tree = comments.CommentTree(thread)
+        tree.splice([flat('f', 't1_e'), stub('t1_f', 'g', 'h')])
+        assert [c['id'] for c in tree] == ['a', 'b', 'c', 'd', 'e', 'f']
+        assert [(p, d['children']) for p, d in tree.more] == \
+            [(0, ['x', 'y']), (5, ['g', 'h']), (-1, ['z'])]
+
+    def test_splice_ignores_duplicates(self, thread):
+        tree = comments.CommentTree(thread)
+        tree.splice([flat('b', 't1_a')])
+        assert len(tree) == 5
+
+
+def morechildren(thread):
+    # Serves api/morechildren from a dictionary of id -> flat thing.
+    def get(url, api_type, link_id, children):
+        assert url == 'api/morechildren' and link_id == 't3_link'
+        things = [thread[id] for id in children.split(',')]
+        return responses.create_response({"json": {"errors": [],
+                                                   "data": {"things": things}}})
+    return get
+
+
+class TestMoreExpander(object):
+
+    @pytest.mark.parametrize('concurrency', [1, 3])
+    def test_expands_everything(self, concurrency):
+        extra = dict(('m{i}'.format(i=i), flat('m{i}'.format(i=i), 't1_root'))
+                     for i in range(250))
+        extra['deep'] = flat('deep', 't1_m0')
+        extra['stub'] = stub('t1_m0', 'deep')
+        tree = comments.CommentTree(listing(
+            comment('root', stub('t1_root', *sorted(k for k in extra if k[0] == 'm')),
+                    link_id='t3_link', parent_id='t3_link'),
+            stub('t3_link', 'stub')))
+
+        snoo = mock.Mock()
+        snoo.get.side_effect = morechildren(extra)
+        expander = comments.MoreExpander(snoo, tree, concurrency=concurrency)
+        assert expander.link_id == 't3_link'
+        assert expander.expand() is tree
+
+        assert len(tree) == 252
+        assert tree.descendant_count(tree.index('t1_root')) == 251
+        assert tree.parents[tree.index('t1_deep')] == tree.index('t1_m0')
+        assert tree.more == []
+        # 251 IDs in the first round, then the one stub found in the results.
+        assert expander.stats['requests'] == 3 + 1
+        assert expander.stats['rounds'] == 2
+        assert expander.stats['comments'] == 252 - 1
+
+    def test_failed_request_keeps_missing_ids(self):
+        extra = dict(('m{i:03}'.format(i=i), flat('m{i:03}'.format(i=i), 't1_root'))
+                     for i in range(150))
+        tree = comments.CommentTree(listing(
+            comment('root', stub('t1_root', *sorted(extra)), link_id='t3_link'),
+            stub('t3_link', 'solo')))
+        extra['solo'] = flat('solo', 't3_link')
+
+        serve = morechildren(extra)
+        calls = []
+
+        def get(url, **params):
+            calls.append(params['children'])
+            if len(calls) == 2:
+                raise errors.RedditError("Too many requests")
+            return serve(url, **params)
+
+        snoo = mock.Mock()
+        snoo.get.side_effect = get
+        expander = comments.MoreExpander(snoo, tree)
+        with pytest.raises(errors.RedditError):
+            expander.expand_once()
+
+        # The first 100 IDs arrived; the rest of that stub, and the other stub, didn't
+        assert len(tree) == 101
+        assert [d['children'] for p, d in tree.more] == \
+            [sorted(extra)[100:150], ['solo']]
+        assert expander.stats['failed'] == 1
+
+        expander.expand()
+        assert len(tree) == 152
+        assert tree.more == []
+        assert calls[-1].split(',') == sorted(extra)[100:150] + ['solo']
+
+    def test_continue_thread_stubs_are_left(self):
+        tree = comments.CommentTree(listing(
+            comment('a', stub('t1_a'), link_id='t3_link')))
+        snoo = mock.Mock()
+        expander = comments.MoreExpander(snoo, tree)
+        assert expander.pending() == []
+        expander.expand()
+        assert not snoo.get.called
+        assert len(tree.more) == 1
+
+    def test_needs_link_id(self):
+        with pytest.raises(ValueError):
+            comments.MoreExpander(mock.Mock(), comments.CommentTree(listing()))
@@ -0,0 +1,45 @@
+import snooble
+
+import subprocess
+import sys
+
+import pytest
+
+
+def modules_loaded_by(code):
+    script = "import sys\n{code}\nprint(' '.join(sorted(sys.modules)))".format(code=code)
+    output = subprocess.check_output([sys.executable, '-c', script])
+    return set(output.decode('ascii').split())
+
+
+class TestLazyImports(object):
+
+    def test_import_is_lazy(self):
+        loaded = modules_loaded_by("import snooble")
+        assert 'requests' not in loaded
+        assert 'urllib3' not in loaded
+        assert 'asyncio' not in loaded
+        assert 'snooble.core' not in loaded
+
+    def test_light_modules_dont_import_requests(self):
+        loaded = modules_loaded_by(
+            "import snooble\n"
+            "snooble.RateLimiter(5, 1).take()\n"
+            "snooble.responses.create_response({'kind': 't3', 'data': {'id': 'a'}})\n"
+            "snooble.oauth.OAuth(snooble.oauth.IMPLICIT_KIND, scopes=['read'],"
+            "                    client_id='ClientID', redirect_uri='https://my.site')")
+        assert 'snooble.ratelimit' in loaded and 'snooble.responses' in loaded
+        assert 'requests' not in loaded
+
+        loaded = modules_loaded_by("import snooble\nsnooble.Snooble('useragent')")
+        assert 'requests' in loaded
+
+    def test_lazy_attributes(self):
+        assert snooble.Snooble is snooble.core.Snooble
+        assert snooble.AUTH_DOMAIN == snooble.core.AUTH_DOMAIN
+        assert snooble.RateLimiter is snooble.ratelimit.RateLimiter
+        assert snooble.errors.RedditError
+        assert 'Snooble' in dir(snooble) and 'transport' in dir(snooble)
+
+        with pytest.raises(AttributeError):
+            snooble.not_a_real_attribute
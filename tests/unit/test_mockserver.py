@@ -0,0 +1,80 @@
+import snooble
+from snooble import mockserver
+
+import pytest
+import requests
+
+from helpers import connect
+
+
+class TestMockReddit(object):
+
+    def test_authorization(self, server):
+        snoo = connect(server)
+        assert snoo.authorized
+        assert snoo.get('api/v1/me')['name'] == 'mock_user'
+
+        response = requests.get(server.url + 'api/v1/me')
+        assert response.status_code == 401
+        assert server.stats['unauthorized'] == 1
+
+    def test_listings(self, server):
+        snoo = connect(server)
+        newest = server.newest_link()
+        listing = snoo.get('r/snooble/new', limit=10)
+        assert len(listing) == 10
+        assert all(thing['subreddit'] == 'snooble' for thing in listing)
+        assert listing[0]['id'] == snooble.utils.base36_encode(newest - newest % 2)
+
+        both = snoo.get('r/snooble+python/new', limit=10)
+        assert [thing.fullname for thing in both] == \
+            [snooble.utils.join_fullname('t3', n) for n in range(newest, newest - 10, -1)]
+
+        after = snoo.get('r/all/new', limit=5, after=both[4].fullname)
+        assert [thing.fullname for thing in after] == [t.fullname for t in both][5:]
+
+        before = snoo.get('r/all/new', limit=2, before=both[5].fullname)
+        assert [thing.fullname for thing in before] == [t.fullname for t in both][3:5]
+
+        comments = snoo.get('r/python/comments', limit=3)
+        assert all(thing.fullname.startswith('t1_') for thing in comments)
+
+    def test_info_and_morechildren(self, server):
+        snoo = connect(server)
+        newest = server.newest_link()
+        names = ['t3_1', 't3_' + snooble.utils.base36_encode(newest + 1000), 't1_5']
+        link, missing, comment = snoo.info(names)
+        assert link['title'] == 'Synthetic submission 1'
+        assert missing is None
+        assert comment['link_id'] == 't3_1'
+
+        subreddit = snoo.get('api/info', sr_name='python')[0]
+        assert type(subreddit) is snooble.responses.Subreddit
+
+        more = snoo.get('api/morechildren', api_type='json', link_id='t3_1',
+                        children='6,7')
+        assert [t['data']['name'] for t in more['json']['data']['things']] == \
+            ['t1_6', 't1_7']
+
+    def test_ratelimit_headers_and_429s(self):
+        with mockserver.MockReddit(ratelimit=(3, 600)) as server:
+            snoo = connect(server)
+            raw = snoo.get_raw('api/v1/me')
+            assert raw.headers['X-Ratelimit-Used'] == '1'
+            assert raw.headers['X-Ratelimit-Remaining'] == '2'
+
+            snoo.get('api/v1/me')
+            snoo.get('api/v1/me')
+            with pytest.raises(snooble.errors.RedditError) as excinfo:
+                snoo.get('api/v1/me')
+            assert excinfo.value.response.status_code == 429
+            assert 'Retry-After' in excinfo.value.response.headers
+            assert server.stats['throttled'] == 1
+
+    def test_error_injection(self):
+        with mockserver.MockReddit(error_rate=1, seed=1) as server:
+            snoo = connect(server)
+            with pytest.raises(snooble.errors.RedditError):
+                snoo.get('api/v1/me')
+            assert server.stats['errors'] == 1
+            assert server.stats['/api/v1/me'] == 1
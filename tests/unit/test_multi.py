@@ -0,0 +1,69 @@
+from snooble import multi, responses
+
+from unittest import mock
+
+
+def page(*things):
+    children = [{"kind": "t3", "data": {"name": "t3_{i}".format(i=i), "subreddit": sub,
+                                        "created_utc": created}}
+                for i, sub, created in things]
+    return responses.create_response({"kind": "Listing", "data": {"children": children}})
+
+
+class TestPacking(object):
+
+    def test_packs_by_weight(self):
+        poller = multi.MultiredditPoller(mock.Mock(), limit=10, target_fill=0.5)
+        poller.watch('busy', weight=4)
+        for name in 'abcdef':
+            poller.watch(name)
+
+        assert poller.groups == ['r/busy+a/new', 'r/b+c+d+e+f/new']
+
+    def test_packs_by_path_length(self):
+        poller = multi.MultiredditPoller(mock.Mock(), sort='comments',
+                                         max_path_length=len('r/aaaa+bbbb/comments'))
+        for name in ['aaaa', 'bbbb', 'cccc']:
+            poller.watch(name)
+        assert poller.groups == ['r/aaaa+bbbb/comments', 'r/cccc/comments']
+
+    def test_unwatch_repacks(self):
+        poller = multi.MultiredditPoller(mock.Mock())
+        poller.watch('Python')
+        poller.watch('django')
+        assert poller.groups == ['r/Python+django/new']
+        poller.unwatch('python')
+        assert poller.groups == ['r/django/new']
+
+
+class TestPolling(object):
+
+    def test_demultiplexes_and_merges(self):
+        snoo = mock.Mock()
+        responses_by_path = {
+            'r/a+b/new': page((4, 'b', 40), (2, 'a', 20), (1, 'a', 10)),
+            'r/c/new': page((5, 'c', 50), (3, 'c', 30)),
+        }
+        snoo.get.side_effect = lambda path, **params: responses_by_path[path]
+
+        callbacks = dict((name, mock.Mock()) for name in 'abc')
+        poller = multi.MultiredditPoller(snoo, limit=4, target_fill=0.5)
+        for name, callback in sorted(callbacks.items()):
+            poller.watch(name, callback)
+
+        merged = poller.poll()
+        assert [t.fullname for t in merged] == ['t3_1', 't3_2', 't3_3', 't3_4', 't3_5']
+        assert snoo.get.call_count == 2
+        assert [t.fullname for t in callbacks['a'].call_args[0][0]] == ['t3_1', 't3_2']
+        assert [t.fullname for t in callbacks['b'].call_args[0][0]] == ['t3_4']
+        assert [t.fullname for t in callbacks['c'].call_args[0][0]] == ['t3_3', 't3_5']
+
+    def test_no_duplicates_after_repacking(self):
+        snoo = mock.Mock()
+        snoo.get.return_value = page((1, 'a', 10))
+        poller = multi.MultiredditPoller(snoo)
+        poller.watch('a')
+        assert len(poller.poll()) == 1
+
+        poller.watch('b')
+        assert poller.poll() == []
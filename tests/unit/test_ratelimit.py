@@ -1,5 +1,8 @@
 from snooble import ratelimit
 
+import multiprocessing
+import os
+import threading
 import time  # used to monkeypatch this module
 
 from unittest import mock
@@ -128,6 +131,95 @@ class TestRatelimit(object):
         rl.take(30)
         assert "current=30" in repr(rl)
 
+    def test_limited_decorator(self):
+        take_mocker = mock.Mock(return_value=True)
+        ratelimiter = ratelimit.RateLimiter(1, 1)
+        ratelimiter.take = take_mocker
+
+        @ratelimiter.limited
+        def fetch(url, limit=25):
+            """Fetch a url."""
+            return url, limit
+
+        assert not take_mocker.called
+        assert fetch('r/python', limit=100) == ('r/python', 100)
+        assert fetch('r/snooble') == ('r/snooble', 25)
+        assert take_mocker.call_count == 2
+        assert fetch.__name__ == 'fetch'
+        assert fetch.__doc__ == "Fetch a url."
+
+    def test_context_manager(self):
+        take_mocker = mock.Mock(return_value=True)
+        ratelimiter = ratelimit.RateLimiter(1, 1)
+        ratelimiter.take = take_mocker
+
+        with ratelimiter as limiter:
+            assert limiter is ratelimiter
+            assert take_mocker.call_count == 1
+
+        with pytest.raises(KeyError):
+            with ratelimiter:
+                raise KeyError
+        assert take_mocker.call_count == 2
+
+    def test_threads_share_bucket(self):
+        limiter = ratelimit.RateLimiter(400, 60)
+        threads = [threading.Thread(target=limiter.take, args=(50,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert limiter.current_bucket == 0
+
+    def test_lock_is_replaced_after_fork(self):
+        limiter = ratelimit.RateLimiter(5, 1)
+        limiter._lock.acquire()
+        limiter._after_fork()
+        limiter.take()
+        assert limiter.current_bucket == 4
+
+
+@pytest.mark.skipif(not hasattr(os, 'register_at_fork'), reason="needs os.fork")
+class TestSharedRatelimit(object):
+
+    def test_acts_like_a_ratelimiter(self):
+        limiter = ratelimit.SharedRateLimiter(5, 1)
+        assert limiter.current_bucket == 5
+        limiter.take(2)
+        assert limiter.current_bucket == 3
+        assert limiter == ratelimit.SharedRateLimiter(5, 1)
+
+    def test_sleeps_without_the_lock(self, monkeypatch):
+        limiter = ratelimit.SharedRateLimiter(1, 1)
+        monkeypatch.setattr(time, 'perf_counter',
+                            mock.Mock(side_effect=[0.1, 0.4, 1.2]))
+        unlocked = []
+
+        def sleep(seconds):
+            unlocked.append(limiter._lock.acquire(block=False))
+            limiter._lock.release()
+        monkeypatch.setattr(time, 'sleep', mock.Mock(side_effect=sleep))
+
+        limiter.last_refresh = 0
+        limiter.take()
+        limiter.take()
+        assert time.sleep.call_args_list == [mock.call(0.9), mock.call(0.6)]
+        assert unlocked == [True, True]
+        assert limiter.current_bucket == 0 and limiter.last_refresh == 1.2
+
+    def test_processes_share_bucket(self):
+        limiter = ratelimit.SharedRateLimiter(20, 60)
+        context = multiprocessing.get_context('fork')
+        processes = [context.Process(target=limiter.take, args=(5,)) for _ in range(3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        assert [process.exitcode for process in processes] == [0, 0, 0]
+        assert limiter.current_bucket == 5
+
 
 class TestLimitation(object):
 
@@ -196,6 +288,37 @@ class TestLimitation(object):
         assert (test_object.limited_method.call_args ==
                 mock.call("arg1", "arg2", ["args4", "and 5"], name="hello"))
 
+    def test_wrapper_is_cached(self):
+        take_mocker = mock.Mock(return_value=True)
+        ratelimiter = ratelimit.RateLimiter(1, 1)
+        ratelimiter.take = take_mocker
+
+        test_object = mock.Mock()
+        test_object.limited_attribute = "limited"
+        limited_object = ratelimiter.limitate(
+            test_object, ['limited_method', 'limited_attribute'])
+
+        assert limited_object.limited_method is limited_object.limited_method
+        limited_object.limited_method()
+        limited_object.limited_method()
+        assert take_mocker.call_count == 2
+        assert test_object.limited_method.call_count == 2
+
+        # Non-callable attributes aren't cached, so every access is still limited
+        take_mocker.reset_mock()
+        limited_object.limited_attribute
+        limited_object.limited_attribute
+        assert take_mocker.call_count == 2
+
+    def test_cached_wrapper_sees_reassigned_method(self):
+        ratelimiter = ratelimit.RateLimiter(100, 1)
+        test_object = mock.Mock()
+        limited_object = ratelimiter.limitate(test_object, ['limited_method'])
+
+        limited_object.limited_method()
+        test_object.limited_method = mock.Mock(return_value="replaced")
+        assert limited_object.limited_method() == "replaced"
+
     @pytest.mark.xfail
     def test_wrapper_looks_like_object(self):
         take_mocker = mock.Mock(return_value=True)
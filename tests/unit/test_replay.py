@@ -0,0 +1,94 @@
+import snooble
+from snooble import replay
+
+import json
+import time  # used to monkeypatch this module
+from unittest import mock
+
+import pytest
+import requests
+
+
+def make_response(status, body):
+    response = requests.models.Response()
+    response.status_code = status
+    response._content = json.dumps(body).encode('utf-8')
+    response.headers['Content-Type'] = 'application/json; charset=UTF-8'
+    return response
+
+
+def fake_reddit(method, url, **kwargs):
+    if url.endswith('access_token'):
+        return make_response(200, {"token_type": "bearer", "access_token": "tok",
+                                   "expires_in": 3600})
+    return make_response(200, {"kind": "t3", "data": {"id": kwargs['params']['id']}})
+
+
+def script_snooble(session):
+    snoo = snooble.Snooble('my-test-useragent', ratelimit=(1000, 1), session=session)
+    snoo.oauth(snooble.oauth.SCRIPT_KIND, scopes=['read'], client_id='ClientID',
+               secret_id='SecretID', username='my-username', password='my-password')
+    snoo.authorize()
+    return snoo
+
+
+@pytest.fixture(params=['log.jsonl', 'log.jsonl.gz'])
+def log(request, tmpdir):
+    session = mock.Mock(headers={})
+    session.request.side_effect = fake_reddit
+    recorder = replay.RecordingSession(session, str(tmpdir.join(request.param)))
+
+    snoo = script_snooble(recorder)
+    assert snoo.get('api/info', id='a')['id'] == 'a'
+    assert snoo.get_raw('api/info', id='b').body == b'{"kind": "t3", "data": {"id": "b"}}'
+    recorder.close()
+    return recorder.path
+
+
+class TestRecordReplay(object):
+
+    def test_recording(self, log):
+        records = replay.ReplaySession(log).records
+        assert [(r['method'], r['url']) for r in records] == [
+            ('POST', snooble.WWW_DOMAIN + 'api/v1/access_token'),
+            ('GET', snooble.AUTH_DOMAIN + 'api/info'),
+            ('GET', snooble.AUTH_DOMAIN + 'api/info')]
+        assert records[0]['data'] is None
+        assert 'my-password' not in json.dumps(records)
+        assert records[1]['params'] == {'id': 'a'}
+        assert records[0]['t'] <= records[1]['t'] <= records[2]['t']
+
+    def test_replay_offline(self, log):
+        session = replay.ReplaySession(log)
+        snoo = script_snooble(session)
+        assert snoo._auth.authorization.token == 'tok'
+        assert snoo.get('api/info', id='a')['id'] == 'a'
+        assert snoo.get_raw('api/info', id='b').status == 200
+        assert session.remaining == 0
+
+        with pytest.raises(snooble.errors.SnoobleError):
+            snoo.get('api/info', id='c')
+
+    def test_replay_matches_params(self, log):
+        session = replay.ReplaySession(log)
+        snoo = script_snooble(session)
+        # The record for id=b is used for id=b, even though id=a was recorded first
+        assert snoo.get('api/info', id='b')['id'] == 'b'
+        with pytest.raises(snooble.errors.SnoobleError):
+            snoo.get('api/info', id='b')
+        assert snoo.get('api/info', id='a')['id'] == 'a'
+
+    def test_match_key_is_canonical(self):
+        assert replay._match_key('get', 'u', {'b': 1, 'a': ['x', 'y'], 'c': None}, None) \
+            == replay._match_key('GET', 'u', [('a', 'x'), ('a', 'y'), ('b', '1')], {}) \
+            == ('GET', 'u', 'a=x&a=y&b=1', '')
+
+    def test_replay_through_snooble(self, log, monkeypatch):
+        sleep = mock.Mock()
+        monkeypatch.setattr(time, 'sleep', sleep)
+
+        session = replay.ReplaySession(log, speed=2)
+        snoo = script_snooble(session)
+        results = session.replay(snoo)
+        assert [r['id'] for r in results] == ['a', 'b']
+        assert sleep.called
@@ -0,0 +1,67 @@
+from snooble import responses
+
+import gc
+
+from helpers import listing, thing
+
+
+class TestCreateResponse(object):
+
+    def test_kinds(self):
+        assert type(responses.create_response(thing('t3', 'abc'))) is responses.Response
+        assert type(responses.create_response(thing('t5', 'abc'))) is responses.Subreddit
+        resp = responses.create_response(listing(thing('t5', 'a'), thing('t3', 'b')))
+        assert type(resp) is responses.Listing
+        assert [type(c) for c in resp] == [responses.Subreddit, responses.Response]
+
+    def test_without_kind(self):
+        resp = responses.create_response({"karma": 1})
+        assert resp['karma'] == 1
+        assert resp.fullname is None
+
+    def test_fullname(self):
+        assert responses.create_response(thing('t3', 'abc')).fullname == 't3_abc'
+        nameless = {"kind": "t1", "data": {"id": "xyz"}}
+        assert responses.create_response(nameless).fullname == 't1_xyz'
+
+
+class TestIdentityMap(object):
+
+    def test_merges_into_existing_object(self):
+        idmap = responses.IdentityMap()
+        first = responses.create_response(listing(thing('t3', 'a', score=1)), idmap)
+        second = responses.create_response(listing(thing('t3', 'a', score=5),
+                                                   thing('t3', 'b', score=2)), idmap)
+
+        assert first[0] is second[0]
+        assert second[0]['score'] == 5
+        assert second[0].changed == {'score'}
+        assert second[1].changed == frozenset()
+        assert len(idmap) == 2
+
+    def test_update_reports_added_and_removed_keys(self):
+        resp = responses.create_response(thing('t3', 'a', score=1, title='x'))
+        changed = resp.update(thing('t3', 'a', score=1, edited=True))
+        assert changed == {'title', 'edited'}
+        assert resp.changed == changed
+        assert 'title' not in resp
+
+    def test_weak_references(self):
+        idmap = responses.IdentityMap()
+        resp = responses.create_response(thing('t3', 'a'), idmap)
+        assert 't3_a' in idmap and idmap.get('t3_a') is resp
+
+        del resp
+        gc.collect()
+        assert 't3_a' not in idmap
+
+    def test_lru_eviction(self):
+        idmap = responses.IdentityMap(size=2)
+        a = responses.create_response(thing('t3', 'a'), idmap)
+        responses.create_response(thing('t3', 'b'), idmap)
+        assert responses.create_response(thing('t3', 'a'), idmap) is a
+        responses.create_response(thing('t3', 'c'), idmap)
+
+        assert 't3_a' in idmap and 't3_c' in idmap
+        assert 't3_b' not in idmap
+        assert len(idmap) == 2
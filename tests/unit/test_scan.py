@@ -0,0 +1,59 @@
+from snooble import scan, responses
+
+import itertools
+import json
+from unittest import mock
+
+import pytest
+
+
+def info(fullnames):
+    # Every third ID doesn't exist.
+    return [responses.create_response({"kind": "t3", "data": {"name": name}})
+            if int(name[3:], 36) % 3 else None for name in fullnames]
+
+
+@pytest.fixture
+def snoo():
+    snoo = mock.Mock()
+    snoo.info.side_effect = info
+    return snoo
+
+
+class TestIDScanner(object):
+
+    @pytest.mark.parametrize('concurrency', [1, 3])
+    def test_scans_range_in_order(self, snoo, concurrency):
+        scanner = scan.IDScanner(snoo, 't3', 1, 450, concurrency=concurrency)
+        result = [thing.fullname for thing in scanner]
+
+        assert result == ['t3_' + scan.utils.base36_encode(n)
+                          for n in range(1, 451) if n % 3]
+        assert snoo.info.call_count == 5
+        assert len(snoo.info.call_args_list[0][0][0]) == 100
+        assert scanner.stats == {'requests': 5, 'scanned': 450, 'found': 300}
+        assert scanner.remaining == 0
+
+    def test_accepts_base36_ids(self, snoo):
+        scanner = scan.IDScanner(snoo, 't1', 't1_zz', '101')
+        assert (scanner.start, scanner.end) == (1295, 1297)
+        assert [t.fullname for t in scanner] == ['t1_zz', 't1_101']
+
+    def test_checkpoint_and_resume(self, snoo, tmpdir):
+        path = str(tmpdir.join('scan.json'))
+        scanner = scan.IDScanner(snoo, 't3', 1, 300, checkpoint=path)
+        # Consume the first batch and a bit of the second, then give up.
+        list(itertools.islice(scanner, 70))
+
+        assert scanner.position == 101
+        assert json.load(open(path))['position'] == 101
+
+        resumed = scan.IDScanner(snoo, 't3', 1, 300, checkpoint=path)
+        assert resumed.position == 101 and resumed.remaining == 200
+        first = next(iter(resumed))
+        assert first.fullname == 't3_' + scan.utils.base36_encode(101)
+
+    def test_checkpoint_for_other_scan_is_ignored(self, snoo, tmpdir):
+        path = str(tmpdir.join('scan.json'))
+        list(scan.IDScanner(snoo, 't3', 1, 100, checkpoint=path))
+        assert scan.IDScanner(snoo, 't1', 1, 100, checkpoint=path).position == 1
@@ -0,0 +1,110 @@
+from snooble import errors, schedule, responses, ratelimit
+
+import time  # used to monkeypatch this module
+from unittest import mock
+
+import pytest
+
+
+class Clock(object):
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, 'time', clock.time)
+    monkeypatch.setattr(time, 'sleep', clock.sleep)
+    return clock
+
+
+def page(listing, count, created):
+    children = [{"kind": "t3", "data": {"name": "t3_{l}{i}".format(l=listing[2], i=i),
+                                        "created_utc": created}}
+                for i in range(count)]
+    return responses.create_response({"kind": "Listing", "data": {"children": children}})
+
+
+@pytest.fixture
+def snoo():
+    snoo = mock.Mock()
+    snoo._limiter = ratelimit.RateLimiter(60, 60)
+    return snoo
+
+
+class TestPollScheduler(object):
+
+    def test_budget_from_limiter(self, snoo):
+        assert schedule.PollScheduler(snoo).budget == 1
+        assert schedule.PollScheduler(snoo, budget=0.5).budget == 0.5
+
+    def test_allocation_favours_busy_feeds(self, snoo):
+        scheduler = schedule.PollScheduler(snoo, budget=1, min_interval=0,
+                                           max_interval=10000)
+        busy = scheduler.add('r/busy/new', rate=1.0)
+        quiet = scheduler.add('r/quiet/new', rate=0.01)
+
+        # sqrt(1) : sqrt(0.01) = 10 : 1 of the budget.
+        assert busy.interval == pytest.approx(1.1)
+        assert quiet.interval == pytest.approx(11)
+        assert 1 / busy.interval + 1 / quiet.interval == pytest.approx(1)
+
+    def test_interval_capped_to_avoid_overflow(self, snoo):
+        scheduler = schedule.PollScheduler(snoo, budget=0.01, max_interval=10000)
+        feed = scheduler.add('r/busy/new', rate=1.0)
+        assert feed.interval == 50
+
+    def test_runs_feeds_in_due_order(self, snoo, clock):
+        snoo.get.side_effect = lambda listing, **params: page(listing, 0, clock.now)
+        scheduler = schedule.PollScheduler(snoo, budget=1, min_interval=0)
+        scheduler.add('r/a/new', rate=1.0)
+        scheduler.add('r/b/new', rate=0.01)
+
+        polled = [scheduler.run_once()[0].listing for _ in range(2)]
+        assert sorted(polled) == ['r/a/new', 'r/b/new']
+        assert scheduler.run_once()[0].listing == 'r/a/new'
+
+    def test_tracks_rate_and_latency(self, snoo, clock):
+        snoo.get.side_effect = [page('r/a/new', 0, 0), page('r/a/new', 10, clock.now)]
+        callback = mock.Mock()
+        scheduler = schedule.PollScheduler(snoo, budget=1, min_interval=5, smoothing=1)
+        feed = scheduler.add('r/a/new', callback=callback)
+
+        scheduler.run(polls=2)
+        assert feed.rate == pytest.approx(2)
+        assert feed.stats['items'] == 10
+        assert feed.mean_latency == pytest.approx(5)
+        assert callback.call_count == 1
+
+        report = scheduler.report()
+        assert report['r/a/new']['polls'] == 2
+        assert report['r/a/new']['max_latency'] == pytest.approx(5)
+
+    def test_removed_feeds_are_skipped(self, snoo, clock):
+        snoo.get.return_value = page('r/a/new', 0, 0)
+        scheduler = schedule.PollScheduler(snoo)
+        scheduler.add('r/a/new')
+        scheduler.add('r/b/new')
+        scheduler.remove('r/a/new')
+        assert scheduler.run_once()[0].listing == 'r/b/new'
+
+    def test_no_feeds(self, snoo, clock):
+        scheduler = schedule.PollScheduler(snoo)
+        with pytest.raises(errors.SnoobleError):
+            scheduler.run_once()
+
+        # A feed that removes everything, including itself
+        snoo.get.return_value = page('r/a/new', 1, 990)
+        scheduler.add('r/a/new', callback=lambda items: scheduler.remove('r/a/new'))
+        scheduler.run()
+        assert snoo.get.call_count == 1
+        with pytest.raises(errors.SnoobleError):
+            scheduler.run_once()
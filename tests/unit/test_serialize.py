@@ -0,0 +1,64 @@
+from snooble import responses, serialize
+
+import pickle
+
+import pytest
+
+from helpers import listing, thing
+
+
+class TestSerialize(object):
+
+    @pytest.mark.parametrize('resp', [
+        thing('t3', 'abc', title='A post', score=10),
+        thing('t5', 'sub', display_name='snooble'),
+        listing(thing('t3', 'a', title='☃'), thing('t5', 'b')),
+        {"name": "snooble_test_account"},
+    ])
+    def test_round_trip(self, resp):
+        original = responses.create_response(resp)
+        rebuilt = serialize.loads(serialize.dumps(original))
+
+        assert type(rebuilt) is type(original)
+        assert rebuilt.json == original.json
+        assert list(rebuilt) == list(original)
+
+    def test_listing_children_are_rebuilt(self):
+        original = responses.create_response(listing(thing('t5', 'a'), thing('t3', 'b')))
+        rebuilt = serialize.loads(serialize.dumps(original))
+        assert [type(c) for c in rebuilt] == [responses.Subreddit, responses.Response]
+
+    def test_compresses(self):
+        original = responses.create_response(
+            listing(*[thing('t3', str(i), title='title', selftext='x' * 100)
+                      for i in range(100)]))
+        assert len(serialize.dumps(original)) < len(pickle.dumps(original)) / 5
+
+    @pytest.mark.parametrize('level', [0, 1, 9])
+    def test_levels(self, level):
+        original = responses.create_response(listing(thing('t3', 'a', title='x' * 50)))
+        rebuilt = serialize.loads(serialize.dumps(original, level=level))
+        assert rebuilt.json == original.json
+
+    def test_rejects_foreign_data(self):
+        with pytest.raises(ValueError):
+            serialize.loads(b'not a snooble payload')
+        with pytest.raises(ValueError):
+            serialize.loads(serialize.MAGIC + b'\x07Unknown' + b'')
+
+    def test_rejects_unregistered_types(self):
+        class Custom(responses.Response):
+            pass
+
+        with pytest.raises(TypeError):
+            serialize.dumps(Custom(thing('t3', 'a')))
+
+
+class TestPickle(object):
+
+    def test_pickle_stores_json_once(self):
+        original = responses.create_response(listing(thing('t3', 'a', score=1)))
+        rebuilt = pickle.loads(pickle.dumps(original))
+        assert type(rebuilt) is responses.Listing
+        assert rebuilt.json == original.json
+        assert rebuilt[0]['score'] == 1
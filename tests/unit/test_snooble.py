@@ -1,9 +1,30 @@
 import snooble
 
 import pytest
+from concurrent import futures
+from unittest import mock
 from urllib.parse import quote_plus
 
 
+def fake_response(json, status_code=200):
+    response = mock.Mock(status_code=status_code, content=b'...')
+    response.json.return_value = json
+    return response
+
+
+@pytest.fixture
+def session():
+    session = mock.Mock()
+    session.get.return_value = fake_response({"kind": "t3", "data": {"id": "abc"}})
+    return session
+
+
+def info_response(url, headers, params):
+    children = [{"kind": "t3", "data": {"name": name}}
+                for name in params['id'].split(',') if not name.endswith('missing')]
+    return fake_response({"kind": "Listing", "data": {"children": children}})
+
+
 class TestSnooble(object):
 
     def test_initialisation(self):
@@ -110,3 +131,146 @@ class TestSnooble(object):
         snoo = snooble.Snooble('my-test-useragent', auth=auth)
         with pytest.raises(ValueError):
             snoo.authorize()
+
+    def test_identity_map_option(self):
+        assert snooble.Snooble('my-test-useragent').identity_map is None
+
+        snoo = snooble.Snooble('my-test-useragent', identity_map=True)
+        assert isinstance(snoo.identity_map, snooble.responses.IdentityMap)
+
+        idmap = snooble.responses.IdentityMap(size=10)
+        snoo = snooble.Snooble('my-test-useragent', identity_map=idmap)
+        assert snoo.identity_map is idmap
+
+    def test_get(self, snoo, session):
+        resp = snoo.get('api/info', id='t3_abc')
+        assert type(resp) is snooble.responses.Response
+        assert resp['id'] == 'abc'
+
+        args, kwargs = session.get.call_args
+        assert args == (snooble.AUTH_DOMAIN + 'api/info',)
+        assert kwargs['params'] == {'id': 't3_abc'}
+        assert kwargs['headers'] == {'Authorization': 'bearer my-token'}
+
+    def test_get_raw(self, snoo, session):
+        session.get.return_value.status_code = 200
+        session.get.return_value.headers = {'Content-Encoding': 'gzip'}
+        session.get.return_value.raw.read.return_value = b'compressed-body'
+
+        raw = snoo.get_raw('r/snooble/new', limit=5)
+        assert raw == (200, {'Content-Encoding': 'gzip'}, b'compressed-body')
+        assert raw.body == b'compressed-body'
+        assert not session.get.return_value.json.called
+        assert session.get.return_value.raw.read.call_args == \
+            mock.call(decode_content=False)
+
+        args, kwargs = session.get.call_args
+        assert kwargs['params'] == {'limit': 5}
+        assert kwargs['stream'] is True
+
+    def test_requests_are_ratelimited(self, snoo):
+        snoo._limiter.take = mock.Mock()
+        snoo.get_raw('r/snooble/new')
+        assert snoo._limiter.take.called
+
+    def test_decode_executor(self, snoo, session):
+        session.get.return_value.content = \
+            b'{"kind": "Listing", "data": {"children": [{"kind": "t5", "data": {}}]}}'
+
+        with futures.ProcessPoolExecutor(1) as executor:
+            snoo.decode_executor = executor
+            resp = snoo.get('subreddits/new')
+
+        assert not session.get.return_value.json.called
+        assert type(resp) is snooble.responses.Listing
+        assert type(resp[0]) is snooble.responses.Subreddit
+
+    def test_decode_executor_with_identity_map(self, snoo, session):
+        session.get.return_value.content = b'{"kind": "t3", "data": {"name": "t3_a"}}'
+        snoo.identity_map = snooble.responses.IdentityMap()
+
+        with futures.ThreadPoolExecutor(1) as executor:
+            snoo.decode_executor = executor
+            first, second = snoo.get('api/info'), snoo.get('api/info')
+
+        assert first is second
+        assert snoo.identity_map.get('t3_a') is first
+
+    def test_decode_executor_returns_bytes(self, snoo, session):
+        # Only the parsed data crosses the process boundary, as bytes, and the response
+        # objects are built once, in this process
+        session.get.return_value.content = b'{"kind": "t3", "data": {"name": "t3_a"}}'
+        executor = mock.Mock()
+        sent = []
+
+        def submit(func, *args):
+            result = futures.Future()
+            result.set_result(func(*args))
+            sent.append(result.result())
+            return result
+        executor.submit.side_effect = submit
+        snoo.decode_executor = executor
+
+        with mock.patch.object(snooble.responses, 'create_response',
+                               wraps=snooble.responses.create_response) as create:
+            resp = snoo.get('api/info')
+
+        assert type(sent[0]) is bytes
+        assert executor.submit.call_args[0][0] is snooble.responses.decode
+        assert create.call_count == 1
+        assert resp.fullname == 't3_a'
+
+    @pytest.mark.parametrize('concurrency', [1, 4])
+    def test_info_batches(self, snoo, session, concurrency):
+        session.get.side_effect = info_response
+        names = ['t3_{i}'.format(i=i) for i in range(250)]
+        names[10] = 't3_missing'
+
+        result = snoo.info(names, concurrency=concurrency)
+        assert session.get.call_count == 3
+        assert sorted(len(c[1]['params']['id'].split(','))
+                      for c in session.get.call_args_list) == [50, 100, 100]
+
+        assert len(result) == 250
+        assert result[10] is None
+        assert [r.fullname for r in result if r is not None] == \
+            [n for n in names if n != 't3_missing']
+
+    def test_info_deduplicates(self, snoo, session):
+        session.get.side_effect = info_response
+        result = snoo.info(['t3_a', 't3_b', 't3_a'])
+        assert session.get.call_args[1]['params'] == {'id': 't3_a,t3_b'}
+        assert [r.fullname for r in result] == ['t3_a', 't3_b', 't3_a']
+
+        assert snoo.info('t3_c')[0].fullname == 't3_c'
+
+    def test_errors_raise(self, snoo, session):
+        session.get.return_value = fake_response({"error": 403}, status_code=403)
+        with pytest.raises(snooble.errors.RedditError) as excinfo:
+            snoo.get('r/private/about')
+        assert excinfo.value.response is session.get.return_value
+
+        # Raw requests are passed through whatever their status.
+        session.get.return_value.raw.read.return_value = b'{"error": 403}'
+        assert snoo.get_raw('r/private/about').status == 403
+
+    def test_post_put_delete(self, snoo, session):
+        snoo._limiter.take = mock.Mock()
+        session.post.return_value = fake_response({"json": {"errors": []}})
+        session.put.return_value = fake_response({"kind": "t3", "data": {"id": "a"}})
+        session.delete.return_value = fake_response(None, status_code=204)
+        session.delete.return_value.content = b''
+
+        assert snoo.post('api/approve', id='t3_a')['json'] == {"errors": []}
+        assert session.post.call_args[1]['data'] == {'id': 't3_a'}
+        assert session.post.call_args[0] == (snooble.AUTH_DOMAIN + 'api/approve',)
+        assert session.post.call_args[1]['headers'] == \
+            {'Authorization': 'bearer my-token'}
+
+        assert snoo.put('api/v1/me/friends/someone', note='hi')['id'] == 'a'
+        assert session.put.call_args[1]['data'] == {'note': 'hi'}
+
+        assert snoo.delete('api/v1/me/friends/someone', id='x') is None
+        assert session.delete.call_args[1]['params'] == {'id': 'x'}
+
+        assert snoo._limiter.take.call_count == 3
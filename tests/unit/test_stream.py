@@ -0,0 +1,173 @@
+from snooble import stream, responses
+
+import itertools
+import time  # used to monkeypatch this module
+from unittest import mock
+
+import pytest
+
+
+def page(*ids, subreddit='snooble'):
+    children = [{"kind": "t3", "data": {"name": "t3_{i}".format(i=i),
+                                        "subreddit": subreddit}} for i in ids]
+    return responses.create_response({"kind": "Listing", "data": {"children": children}})
+
+
+def info(fullnames):
+    # Pretend every other ID exists, and a third of those are in another subreddit.
+    numbers = [int(name[3:], 36) for name in fullnames]
+    return [page(name[3:], subreddit='other' if n % 3 == 0 else 'snooble')[0]
+            if n % 2 == 0 else None for name, n in zip(fullnames, numbers)]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = mock.Mock(side_effect=itertools.count(0, 10))
+    monkeypatch.setattr(time, 'perf_counter', clock)
+    monkeypatch.setattr(time, 'sleep', mock.Mock())
+    return clock
+
+
+class TestStream(object):
+
+    def test_yields_new_items_once_oldest_first(self, clock):
+        snoo = mock.Mock()
+        snoo.get.side_effect = [page(3, 2, 1), page(5, 4, 3), page()]
+        s = stream.Stream(snoo, 'r/snooble/new', limit=10)
+
+        assert [t.fullname for t in s.poll()] == ['t3_1', 't3_2', 't3_3']
+        assert [t.fullname for t in s.poll()] == ['t3_4', 't3_5']
+        assert s.poll() == []
+
+        assert snoo.get.call_args_list == [
+            mock.call('r/snooble/new', limit=10),
+            mock.call('r/snooble/new', limit=10, before='t3_3'),
+            mock.call('r/snooble/new', limit=10, before='t3_5')]
+        assert s.stats['items'] == 5 and s.stats['polls'] == 3
+
+    def test_iteration(self, clock):
+        snoo = mock.Mock()
+        snoo.get.side_effect = [page(2, 1), page(), page(3)]
+        s = stream.Stream(snoo, 'r/snooble/new')
+        assert [t.fullname for t in itertools.islice(s, 3)] == ['t3_1', 't3_2', 't3_3']
+        assert time.sleep.call_count == 2
+
+    def test_interval_adapts_to_rate(self, clock):
+        snoo = mock.Mock()
+        s = stream.Stream(snoo, 'r/snooble/new', limit=100, min_interval=1,
+                          max_interval=120, target_fill=0.5)
+
+        snoo.get.return_value = page()
+        s.poll()
+        # 20 new items every 10 seconds, so 50 items should take 25 seconds.
+        for i in range(10):
+            snoo.get.return_value = page(*range(i * 20, i * 20 + 20))
+            s.poll()
+        assert s.rate == pytest.approx(2, rel=0.05)
+        assert s.interval == pytest.approx(25, rel=0.05)
+
+        # Quiet listings back off, up to the maximum interval.
+        snoo.get.return_value = page()
+        for i in range(20):
+            s.poll()
+        assert s.interval == 120
+
+    def test_full_page_polls_quickly(self, clock):
+        snoo = mock.Mock()
+        s = stream.Stream(snoo, 'r/snooble/new', limit=3, min_interval=2)
+        snoo.get.return_value = page(3, 2, 1)
+        s.poll()
+        assert s.interval == 2
+        assert s.stats['full_pages'] == 1
+
+        snoo.get.return_value = page(6, 5, 4)
+        s.poll()
+        assert s.interval == 2
+        assert s.stats['full_pages'] == 1 and s.stats['backlogged'] == 1
+
+    def test_resync_after_empty_polls(self, clock):
+        snoo = mock.Mock()
+        s = stream.Stream(snoo, 'r/snooble/new', limit=10, resync_after=2)
+        snoo.get.return_value = page(1)
+        s.poll()
+        snoo.get.return_value = page()
+        s.poll()
+        s.poll()
+        snoo.get.return_value = page(2, 1)
+        assert [t.fullname for t in s.poll()] == ['t3_2']
+        assert snoo.get.call_args_list[-1] == mock.call('r/snooble/new', limit=10)
+        assert s.stats['resyncs'] == 1
+
+    def test_snooble_stream(self):
+        import snooble
+        snoo = snooble.Snooble('my-test-useragent')
+        s = snoo.stream('r/snooble/comments', limit=25, sort='new')
+        assert isinstance(s, stream.Stream)
+        assert s.snoo is snoo and s.limit == 25 and s.params == {'sort': 'new'}
+
+
+class TestBackfill(object):
+
+    def test_no_backfill_with_cursor(self, clock):
+        # A page fetched with a cursor starts right after it, even when it's full
+        snoo = mock.Mock()
+        snoo.get.side_effect = [page(2, 1), page('c', 'b', 'a')]
+        s = stream.Stream(snoo, 'r/snooble/new', limit=3, backfill=True)
+        s.poll()
+        assert [t.fullname for t in s.poll()] == ['t3_a', 't3_b', 't3_c']
+        assert not snoo.info.called
+        assert s.stats['gaps'] == 0 and s.completeness == 1.0
+
+    def test_no_backfill_without_full_page(self, clock):
+        snoo = mock.Mock()
+        snoo.get.side_effect = [page(2, 1), page(9, 8)]
+        s = stream.Stream(snoo, 'r/snooble/new', limit=3, backfill=True)
+        s.poll()
+        s.poll()
+        assert not snoo.info.called
+        assert s.completeness == 1.0
+
+    def test_backfills_gap(self, clock):
+        snoo = mock.Mock()
+        snoo.info.side_effect = info
+        # 1 to 3 are seen, then the stream resyncs without a cursor and the page
+        # overflows: 4 to 9 are unknown.
+        snoo.get.side_effect = [page(3, 2, 1), page(), page('c', 'b', 'a')]
+        s = stream.Stream(snoo, 'r/snooble/new', limit=3, backfill=True,
+                          resync_after=1)
+        s.poll()
+        s.poll()
+
+        result = [t.fullname for t in s.poll()]
+        assert snoo.info.call_args == mock.call(['t3_4', 't3_5', 't3_6', 't3_7',
+                                                 't3_8', 't3_9'])
+        # 4 and 8 exist in r/snooble, 6 is in another subreddit.
+        assert result == ['t3_4', 't3_8', 't3_a', 't3_b', 't3_c']
+        assert s.stats['gaps'] == 1 and s.stats['gap_ids'] == 6
+        assert s.stats['backfilled'] == 2
+        assert s.completeness == 1.0
+
+    def test_max_backfill_checks_newest_first(self, clock):
+        snoo = mock.Mock()
+        snoo.info.side_effect = info
+        snoo.get.side_effect = [page(1), page(), page('c', 'b', 'a')]
+        s = stream.Stream(snoo, 'r/all/new', limit=3, backfill=True, max_backfill=4,
+                          resync_after=1)
+        s.poll()
+        s.poll()
+
+        result = [t.fullname for t in s.poll()]
+        assert snoo.info.call_args == mock.call(['t3_6', 't3_7', 't3_8', 't3_9'])
+        assert result == ['t3_6', 't3_8', 't3_a', 't3_b', 't3_c']
+        assert s.stats['unchecked'] == 4
+        assert s.completeness == 0.5
+
+    def test_custom_filter(self, clock):
+        snoo = mock.Mock()
+        snoo.info.side_effect = info
+        snoo.get.side_effect = [page(1), page(), page(5, 4)]
+        s = stream.Stream(snoo, 'r/snooble/new', limit=2, backfill=True,
+                          backfill_filter=lambda thing: True, resync_after=1)
+        s.poll()
+        s.poll()
+        assert [t.fullname for t in s.poll()] == ['t3_2', 't3_4', 't3_5']
@@ -0,0 +1,131 @@
+from snooble import sync, responses
+
+import time  # used to monkeypatch this module
+from unittest import mock
+
+import pytest
+
+NOW = 1000000
+
+
+def page(things, after=None):
+    children = [{"kind": "t3", "data": {"name": "t3_{i}".format(i=i), "created_utc": c,
+                                        "score": s}}
+                for i, c, s in things]
+    return responses.create_response({"kind": "Listing",
+                                      "data": {"children": children, "after": after}})
+
+
+class Listing(object):
+    # A fake newest-first listing served in pages of ``size``.
+
+    def __init__(self, things, size=2):
+        self.things = things
+        self.size = size
+
+    def get(self, url, limit, after=None, **params):
+        start = 0 if after is None else [t[0] for t in self.things].index(after[3:]) + 1
+        chunk = self.things[start:start + self.size]
+        more = start + self.size < len(self.things)
+        return page(chunk, after='t3_' + chunk[-1][0] if more else None)
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    monkeypatch.setattr(time, 'time', mock.Mock(return_value=NOW))
+
+
+@pytest.fixture
+def snoo():
+    snoo = mock.Mock()
+    snoo.listing = Listing([('e', NOW - 10, 5), ('d', NOW - 20, 4), ('c', NOW - 30, 3),
+                            ('b', NOW - 5000, 2), ('a', NOW - 6000, 1)])
+    snoo.get.side_effect = lambda *args, **kwargs: snoo.listing.get(*args, **kwargs)
+    return snoo
+
+
+def names(things):
+    return [thing.fullname for thing in things]
+
+
+class TestListingSync(object):
+
+    def test_first_sync_fetches_everything(self, snoo):
+        syncer = sync.ListingSync(snoo, {}, recent_window=100)
+        delta = syncer.sync('r/snooble/new')
+        assert names(delta.added) == ['t3_e', 't3_d', 't3_c', 't3_b', 't3_a']
+        assert delta.rescored == [] and delta.requests == 3
+
+        checkpoint = syncer.checkpoint('r/snooble/new')
+        assert checkpoint['high_water'] == NOW - 10
+        assert checkpoint['at_high_water'] == ['t3_e']
+        assert sorted(checkpoint['recent']) == ['t3_c', 't3_d', 't3_e']
+
+    def test_later_sync_stops_early(self, snoo):
+        syncer = sync.ListingSync(snoo, {}, recent_window=100)
+        syncer.sync('r/snooble/new')
+
+        snoo.listing = Listing([('g', NOW - 1, 1), ('f', NOW - 2, 1)] +
+                               [('e', NOW - 10, 50)] + snoo.listing.things[1:])
+        snoo.get.reset_mock()
+        delta = syncer.sync('r/snooble/new', sort='new')
+
+        assert names(delta.added) == ['t3_g', 't3_f']
+        assert names(delta.rescored) == ['t3_e']
+        # The third page (with t3_b) is enough to know that everything else is old.
+        assert delta.requests == 3
+        assert snoo.get.call_args_list[0] == \
+            mock.call('r/snooble/new', sort='new', limit=100)
+        assert syncer.checkpoint('r/snooble/new')['high_water'] == NOW - 1
+
+    def test_nothing_changed(self, snoo):
+        syncer = sync.ListingSync(snoo, {}, recent_window=1)
+        syncer.sync('r/snooble/new')
+        delta = syncer.sync('r/snooble/new')
+        assert delta == ([], [], 1)
+
+    def test_items_at_high_water_mark(self, snoo):
+        syncer = sync.ListingSync(snoo, {}, recent_window=1)
+        syncer.sync('r/snooble/new')
+        snoo.listing = Listing([('f', NOW - 10, 1)] + snoo.listing.things)
+        assert names(syncer.sync('r/snooble/new').added) == ['t3_f']
+        assert syncer.checkpoint('r/snooble/new')['at_high_water'] == ['t3_e', 't3_f']
+
+    def test_max_pages_keeps_old_scores(self, snoo):
+        syncer = sync.ListingSync(snoo, {}, recent_window=100)
+        syncer.sync('r/snooble/new')
+
+        limited = sync.ListingSync(snoo, syncer.store, recent_window=100, max_pages=1)
+        delta = limited.sync('r/snooble/new')
+        assert delta.requests == 1
+        assert sorted(limited.checkpoint('r/snooble/new')['recent']) == \
+            ['t3_c', 't3_d', 't3_e']
+
+    def test_max_pages_resumes_from_cursor(self, snoo):
+        syncer = sync.ListingSync(snoo, {}, recent_window=100, max_pages=2)
+        snoo.listing = Listing(snoo.listing.things[-2:])
+        syncer.sync('r/snooble/new')
+
+        # Six new items, but only two pages of two are fetched per sync
+        new = [(c, NOW - 10 - i, 1) for i, c in enumerate('klmnop')]
+        snoo.listing = Listing(new + snoo.listing.things)
+        delta = syncer.sync('r/snooble/new')
+        assert names(delta.added) == ['t3_k', 't3_l', 't3_m', 't3_n']
+        checkpoint = syncer.checkpoint('r/snooble/new')
+        assert checkpoint['high_water'] == NOW - 5000
+        assert checkpoint['resume']['after'] == 't3_n'
+
+        delta = syncer.sync('r/snooble/new')
+        assert names(delta.added) == ['t3_o', 't3_p']
+        checkpoint = syncer.checkpoint('r/snooble/new')
+        assert checkpoint['high_water'] == NOW - 10
+        assert checkpoint['at_high_water'] == ['t3_k'] and 'resume' not in checkpoint
+
+        snoo.listing = Listing([('q', NOW - 1, 1)] + snoo.listing.things)
+        assert names(syncer.sync('r/snooble/new').added) == ['t3_q']
+
+    def test_file_store(self, snoo, tmpdir):
+        path = str(tmpdir.join('sync.json'))
+        sync.ListingSync(snoo, path).sync('r/snooble/new')
+        delta = sync.ListingSync(snoo, path).sync('r/snooble/new')
+        assert delta.added == []
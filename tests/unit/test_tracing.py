@@ -0,0 +1,75 @@
+import snooble
+from snooble import tracing
+
+from unittest import mock
+
+import pytest
+
+
+@pytest.fixture
+def session():
+    session = mock.Mock()
+    session.request.return_value = mock.Mock(
+        status_code=200, content=b'{"kind": "t3", "data": {"id": "abc"}}')
+    session.get.return_value = session.request.return_value
+    session.post.return_value = session.request.return_value
+    session.get.return_value.json.return_value = {"kind": "t3", "data": {"id": "abc"}}
+    return session
+
+
+class TestTracing(object):
+
+    def test_untraced_requests_take_the_usual_path(self, snoo, session):
+        snoo.get('api/info')
+        assert session.get.called
+        assert not session.request.called
+
+    def test_records_phases(self, snoo, session):
+        records = []
+        snoo.add_trace_hook(records.append)
+        resp = snoo.get('api/info', id='t3_abc')
+
+        assert resp['id'] == 'abc'
+        assert session.get.call_args == mock.call(
+            snooble.AUTH_DOMAIN + 'api/info', stream=True, params={'id': 't3_abc'},
+            headers={'Authorization': 'bearer my-token'})
+
+        record, = records
+        assert (record.method, record.url, record.status) == \
+            ('get', snooble.AUTH_DOMAIN + 'api/info', 200)
+        assert record.connect is None
+        for phase in ('limiter_wait', 'ttfb', 'body_read', 'decode', 'build'):
+            assert getattr(record, phase) >= 0
+        assert record.total >= sum(getattr(record, p) for p in tracing.PHASES
+                                   if p != 'connect')
+
+        snoo.remove_trace_hook(records.append)
+        snoo.get('api/info')
+        assert len(records) == 1
+
+    def test_errors_are_recorded_then_raised(self, snoo, session):
+        session.request.return_value.status_code = 503
+        records = []
+        snoo.add_trace_hook(records.append)
+        with pytest.raises(snooble.errors.RedditError):
+            snoo.post('api/remove', id='t3_abc')
+        assert records[0].status == 503 and records[0].decode is None
+
+    def test_raw_requests(self, snoo, session):
+        session.request.return_value.raw.read.return_value = b'body'
+        records = []
+        snoo.add_trace_hook(records.append)
+        assert snoo.get_raw('api/info').body == b'body'
+        assert records[0].decode is None and records[0].build is None
+
+    def test_collector(self, snoo):
+        collector = tracing.TraceCollector()
+        snoo.add_trace_hook(collector)
+        snoo.get('api/info')
+        snoo.get('api/info')
+
+        summary = collector.summary()
+        assert collector.count == 2
+        assert set(summary) == {'limiter_wait', 'ttfb', 'body_read', 'decode', 'build',
+                                'total'}
+        assert summary['total']['max'] >= summary['total']['mean'] > 0
@@ -0,0 +1,235 @@
+import snooble
+from snooble import transport
+
+import asyncio
+import multiprocessing
+import os
+import pytest
+import threading
+import requests
+import urllib3
+from unittest import mock
+
+from helpers import connect
+
+
+class TestRequestsTransport(object):
+
+    def test_is_the_default(self):
+        session = mock.Mock()
+        snoo = snooble.Snooble('my-test-useragent', session=session)
+        assert isinstance(snoo._transport, transport.RequestsTransport)
+        assert snoo._transport.session is session
+
+    def test_calls_session_method(self):
+        session = mock.Mock()
+        requests_transport = transport.RequestsTransport(session)
+        requests_transport.request('get', 'https://example.com', headers={'a': 'b'},
+                                   params={'limit': 5})
+        assert session.get.call_args == mock.call(
+            'https://example.com', headers={'a': 'b'}, params={'limit': 5})
+
+
+class TestUrllib3Transport(object):
+
+    def test_requests(self, server):
+        snoo = connect(server, transport=transport.Urllib3Transport())
+        assert snoo.get('api/v1/me')['name'] == 'mock_user'
+
+        listing = snoo.get('r/snooble/new', limit=10)
+        assert len(listing) == 10
+        assert server.stats['/r/snooble/new'] == 1
+
+        # Form data is sent in the body
+        link, = snoo.post('api/info', id='t3_1')
+        assert link.fullname == 't3_1'
+
+    def test_sends_useragent(self, server):
+        pool_manager = mock.Mock()
+        pool_manager.urlopen.return_value.status = 200
+        pool_manager.urlopen.return_value.data = b'{"kind": "t3", "data": {"id": "a"}}'
+        snoo = connect(server)
+        snoo._transport = transport.Urllib3Transport(pool_manager)
+        snoo._transport.headers['User-Agent'] = snoo.useragent
+
+        assert snoo.get('api/info', id='t3_a', limit=1)['id'] == 'a'
+        args, kwargs = pool_manager.urlopen.call_args
+        assert args == ('GET', server.url + 'api/info?id=t3_a&limit=1')
+        assert kwargs['headers']['User-Agent'] == 'snooble tests'
+        assert kwargs['headers']['Authorization'] == 'bearer mock-token'
+        assert kwargs['body'] is None
+
+    def test_errors_and_raw(self, server):
+        snoo = connect(server, transport=transport.Urllib3Transport())
+        with pytest.raises(snooble.errors.RedditError) as excinfo:
+            snoo.get('not/a/real/path')
+        assert excinfo.value.response.status_code == 404
+
+        raw = snoo.get_raw('api/v1/me')
+        assert raw.status == 200
+        assert b'mock_user' in raw.body
+
+
+class TestAsyncioTransport(object):
+
+    def test_coroutines(self, server):
+        async_transport = transport.AsyncioTransport(transport.Urllib3Transport(),
+                                                     workers=4)
+        snoo = connect(server, transport=async_transport)
+
+        async def fetch():
+            return await asyncio.gather(snoo.aget('api/v1/me'),
+                                        snoo.aget('r/python/new', limit=5),
+                                        snoo.apost('api/info', id='t3_1'))
+
+        me, listing, info = asyncio.run(fetch())
+        assert me['name'] == 'mock_user'
+        assert len(listing) == 5
+        assert info[0].fullname == 't3_1'
+        async_transport.close()
+
+
+class TestWarmup(object):
+
+    def test_opens_connections(self, server):
+        snoo = connect(server, transport=transport.Urllib3Transport())
+        pool = snoo._transport.connection_pool(server.url)
+        assert pool.num_connections == 0
+
+        report = snoo.warmup(connections=3)
+        # The www domain's connection is still open from authorizing, so isn't counted
+        assert report.connections == 3
+        assert report.elapsed > 0 and report.connect_time > 0
+        assert pool.num_connections == 3
+
+        snoo.get('api/v1/me')
+        snoo.get('api/v1/me')
+        assert pool.num_connections == 3
+
+    def test_with_authorization(self, server):
+        snoo = snooble.Snooble('snooble transport tests', www_domain=server.url,
+                               auth_domain=server.url)
+        snoo.oauth(snooble.oauth.SCRIPT_KIND, scopes=['read'], client_id='ClientID',
+                   secret_id='SecretID', username='my-username', password='my-password')
+        pool = snoo._transport.connection_pool(server.url)
+
+        result = snoo.warmup(connections=2, authorize=True, block=False)
+        report = result.result(timeout=5)
+        assert snoo.authorized
+        assert report.connections == 2
+        # Both domains are the same host here, so they share a pool.  Authorization
+        # opens its own connection, unless the warmed ones were ready first.
+        assert pool.num_connections in (2, 3)
+        assert snoo.get('api/v1/me')['name'] == 'mock_user'
+
+    def test_later_requests_reuse_warmed_connections(self, server, monkeypatch):
+        # Separate hosts, so that only warmed connections are in the API domain's pool
+        snoo = snooble.Snooble('snooble transport tests', www_domain=server.url,
+                               auth_domain=server.url.replace('127.0.0.1', 'localhost'))
+        snoo.oauth(snooble.oauth.SCRIPT_KIND, scopes=['read'], client_id='ClientID',
+                   secret_id='SecretID', username='my-username', password='my-password')
+        snoo.authorize()
+        assert snoo.warmup(connections=2).connections == 2
+
+        connects = []
+        real_connect = urllib3.connection.HTTPConnection.connect
+
+        def connect(conn):
+            connects.append(conn)
+            real_connect(conn)
+        monkeypatch.setattr(urllib3.connection.HTTPConnection, 'connect', connect)
+        assert snoo.get('api/v1/me')['name'] == 'mock_user'
+        assert snoo.get('api/v1/me')['name'] == 'mock_user'
+        assert connects == []
+
+    def test_pool_lookup_uses_environment(self, monkeypatch):
+        # requests uses REQUESTS_CA_BUNDLE when sending, which changes the pool's key
+        bundle = requests.certs.where()
+        monkeypatch.setenv('REQUESTS_CA_BUNDLE', bundle)
+        pool = transport.RequestsTransport().connection_pool('https://oauth.reddit.com/')
+        assert pool.ca_certs == bundle
+
+
+class TestForking(object):
+
+    def test_after_fork_drops_connections(self, server):
+        snoo = connect(server, transport=transport.Urllib3Transport())
+        snoo.get('api/v1/me')
+        assert len(snoo._transport.pool_manager.pools) == 1
+        assert len(snoo._session.adapters['http://'].poolmanager.pools) == 1
+
+        snoo._after_fork()
+        assert len(snoo._transport.pool_manager.pools) == 0
+        assert len(snoo._session.adapters['http://'].poolmanager.pools) == 0
+        assert snoo.get('api/v1/me')['name'] == 'mock_user'
+
+    def test_after_fork_rebuilds_default_pools_once(self, server):
+        snoo = connect(server)
+        abandoned = len(transport._abandoned)
+        snoo._after_fork()
+        assert len(transport._abandoned) - abandoned == len(snoo._session.adapters)
+
+    def test_after_fork_takes_no_pool_locks(self, server):
+        snoo = connect(server, transport=transport.Urllib3Transport())
+        snoo.get('api/v1/me')
+        locks = [snoo._transport.pool_manager.pools.lock,
+                 snoo._session.adapters['http://'].poolmanager.pools.lock]
+
+        # Another thread holds the pools' locks, as it might at the time of a fork
+        held, finished = threading.Event(), threading.Event()
+
+        def hold():
+            for lock in locks:
+                lock.acquire()
+            held.set()
+            finished.wait()
+            for lock in locks:
+                lock.release()
+        holder = threading.Thread(target=hold)
+        holder.start()
+        held.wait()
+        try:
+            child = threading.Thread(target=snoo._after_fork, daemon=True)
+            child.start()
+            child.join(timeout=5)
+            assert not child.is_alive()
+        finally:
+            finished.set()
+            holder.join()
+        assert snoo.get('api/v1/me')['name'] == 'mock_user'
+
+    def test_asyncio_executor_is_replaced(self):
+        async_transport = transport.AsyncioTransport(transport.Urllib3Transport())
+        executor = async_transport.executor
+        async_transport.after_fork()
+        assert async_transport.executor is not executor
+
+        given = mock.Mock()
+        async_transport = transport.AsyncioTransport(executor=given)
+        async_transport.after_fork()
+        assert async_transport.executor is given
+
+    @pytest.mark.skipif(not hasattr(os, 'register_at_fork'), reason="needs os.fork")
+    def test_forked_children(self, server):
+        limiter = snooble.ratelimit.SharedRateLimiter(100, 60)
+        snoo = connect(server, ratelimit=limiter)
+        snoo.get('api/v1/me')
+
+        def child(results):
+            # The parent's pooled connection was dropped in the child
+            pools = snoo._session.adapters['http://'].poolmanager.pools
+            results.put((len(pools), snoo.get('api/v1/me')['name']))
+
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        processes = [context.Process(target=child, args=(results,)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        found = [results.get(timeout=10) for _ in processes]
+        for process in processes:
+            process.join()
+
+        assert found == [(0, 'mock_user')] * 4
+        # One token each for authorizing and the first request, then one per child
+        assert limiter.current_bucket == 100 - 2 - 4
+        assert snoo.get('api/v1/me')['name'] == 'mock_user'
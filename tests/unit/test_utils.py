@@ -51,3 +51,56 @@ class TestStrList(object):
     def test_with_iter(self):
         iter_list = iter(['hello', 'goodbye'])
         assert utils.strlist(iter_list) == iter_list
+
+
+class TestChunked(object):
+
+    def test_even_split(self):
+        assert list(utils.chunked(range(6), 3)) == [[0, 1, 2], [3, 4, 5]]
+
+    def test_uneven_split(self):
+        assert list(utils.chunked('abcde', 2)) == [['a', 'b'], ['c', 'd'], ['e']]
+
+    def test_empty(self):
+        assert list(utils.chunked([], 100)) == []
+
+
+class TestBoundedSet(object):
+
+    def test_forgets_oldest(self):
+        seen = utils.BoundedSet(2)
+        seen.add('a')
+        seen.add('b')
+        seen.add('a')
+        assert 'a' in seen and 'b' in seen and len(seen) == 2
+
+        seen.add('c')
+        assert 'a' not in seen
+        assert 'b' in seen and 'c' in seen and len(seen) == 2
+
+
+class TestBase36(object):
+
+    @pytest.mark.parametrize('number,digits', [
+        (0, '0'), (35, 'z'), (36, '10'), (1295, 'zz'), (1704098, '10iw2')])
+    def test_round_trip(self, number, digits):
+        assert utils.base36_encode(number) == digits
+        assert utils.base36_decode(digits) == number
+
+    def test_negative(self):
+        with pytest.raises(ValueError):
+            utils.base36_encode(-1)
+
+    def test_fullnames(self):
+        assert utils.split_fullname('t3_10iw2') == ('t3', 1704098)
+        assert utils.join_fullname('t1', 1704098) == 't1_10iw2'
+
+
+class TestJSONFiles(object):
+
+    def test_round_trip(self, tmpdir):
+        path = str(tmpdir.join('data.json'))
+        assert utils.load_json(path, default={}) == {}
+        utils.save_json(path, {'position': 1})
+        assert utils.load_json(path) == {'position': 1}
+        assert tmpdir.listdir() == [tmpdir.join('data.json')]